@@ -0,0 +1,58 @@
+"""Measures how long importing xibless takes and which widget modules get imported.
+
+Usage: python benchmarks/importtime.py [repeat]
+
+Each measurement runs in a new interpreter, with the xibless of this checkout. The import time is
+the median over `repeat` runs (default: 10) of the cumulative time of the xibless package as
+reported by ``python -X importtime`` (Python 3.7+). Widget modules should only be imported when a
+UI script uses them, so neither ``import xibless`` nor ``xibless --help`` should import any.
+"""
+
+from __future__ import print_function
+
+import sys
+import os.path as op
+import subprocess
+
+ROOT = op.dirname(op.dirname(op.abspath(__file__)))
+WIDGET_MODULES = {
+    'button', 'color', 'combo', 'control', 'font', 'formatter', 'image', 'layout', 'menu',
+    'popup', 'progress', 'radio', 'segment', 'slider', 'splitview', 'table', 'tabview',
+    'textfield', 'textview', 'toolbar', 'view', 'window',
+}
+
+def importTimes(code):
+    # Returns a {module: cumulative microseconds} dict for the modules imported by `code`.
+    output = subprocess.check_output(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=ROOT, stderr=subprocess.STDOUT, universal_newlines=True)
+    result = {}
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        result[name.strip()] = int(cumulative)
+    return result
+
+def importedWidgets(times):
+    names = (name.split('.', 1)[1] for name in times if name.startswith('xibless.'))
+    return sorted(name for name in names if name in WIDGET_MODULES)
+
+def main():
+    if sys.version_info < (3, 7):
+        print("python -X importtime requires Python 3.7+")
+        return 1
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    samples = sorted(importTimes('import xibless')['xibless'] for _ in range(repeat))
+    print("import xibless: {:.2f}ms (median of {})".format(samples[len(samples) // 2] / 1000, repeat))
+    print("  widget modules: {}".format(', '.join(importedWidgets(importTimes('import xibless'))) or 'none'))
+    helpCode = 'import sys, xibless; sys.argv = ["xibless", "--help"]\ntry:\n    xibless.main()\nexcept SystemExit:\n    pass'
+    times = importTimes(helpCode)
+    print("xibless --help: widget modules: {}".format(', '.join(importedWidgets(times)) or 'none'))
+    times = importTimes('import xibless.gen')
+    print("import xibless.gen: {:.2f}ms, widget modules: {}".format(
+        times['xibless.gen'] / 1000, ', '.join(importedWidgets(times)) or 'none'))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
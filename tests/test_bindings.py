@@ -0,0 +1,46 @@
+import xibless
+from xibless.base import GeneratedItem, generateBindingBatch
+
+def generate(tmp_path, script, **options):
+    path = tmp_path / 'ui.py'
+    path.write_text(script)
+    return xibless.generateCode(str(path), 'ui', **options).unit
+
+BOUND_MENU_ITEMS = """
+result = Menu("View")
+first = result.addItem("Show Sidebar")
+first.bind('value', defaults, 'values.ShowSidebar')
+second = result.addItem("Show Status Bar")
+second.bind('value', defaults, 'values.ShowStatusBar')
+"""
+
+def test_batched_bindings_of_menu_items_are_applied_in_their_block(tmp_path):
+    code = generate(tmp_path, BOUND_MENU_ITEMS, batchBindings=True)
+    assert 'applyBindings' not in code
+    for keyPath in ['values.ShowSidebar', 'values.ShowStatusBar']:
+        bindCall = '[result_sub bind:@"value" toObject:[NSUserDefaultsController sharedUserDefaultsController] withKeyPath:@"{}" options:nil];}}'.format(keyPath)
+        assert bindCall in code
+
+def test_batched_bindings_of_views_are_applied_together(tmp_path):
+    script = """
+result = Window(300, 200, "Window")
+first = Checkbox(result, "Show Sidebar")
+first.bind('value', defaults, 'values.ShowSidebar')
+second = Checkbox(result, "Show Status Bar")
+second.bind('value', defaults, 'values.ShowStatusBar')
+"""
+    code = generate(tmp_path, script, batchBindings=True)
+    assert ' bind:' not in code
+    assert 'applyBindings(_bindings, 2, _bindingObjects);' in code
+
+def test_binding_batch_tells_items_with_the_same_varname_apart():
+    first = GeneratedItem()
+    second = GeneratedItem()
+    first.varname = second.varname = 'item'
+    code = generateBindingBatch([
+        (first, '@"value"', 'owner', '@"first"', 'nil'),
+        (second, '@"value"', 'owner', '@"second"', 'nil'),
+    ])
+    assert '{0, @"value", 1, @"first", -1}' in code
+    assert '{2, @"value", 1, @"second", -1}' in code
+    assert 'id _bindingObjects[] = {\nitem,\nowner,\nitem\n};' in code
@@ -0,0 +1,25 @@
+import xibless
+from xibless.report import measureCode
+
+SCRIPT = """
+result = Window(300, 200, "Window")
+table = TableView(result)
+table.addColumn("a", "A", 50)
+table.addColumn("b", "B", 60)
+table.addColumn("c", "C", 70)
+"""
+
+def test_table_driven_loop_is_split_across_the_columns(tmp_path):
+    path = tmp_path / 'ui.py'
+    path.write_text(SCRIPT)
+    result = xibless.generateCode(str(path), 'ui', report=True, tableDriven=True)
+    columns = [c for c in result.costs if c.classname == 'TableColumn']
+    assert len(columns) == 3
+    for measure in ['lines', 'bytes', 'sends']:
+        shares = [getattr(c, measure) for c in columns]
+        assert max(shares) - min(shares) <= 1
+    assert all(c.lines > 0 for c in columns)
+    # The loop is charged to the columns instead of the table, not to both.
+    unitLines, unitBytes, unitSends = measureCode(result.unit)
+    assert sum(c.lines for c in result.costs) <= unitLines
+    assert sum(c.bytes for c in result.costs) <= unitBytes
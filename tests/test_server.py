@@ -0,0 +1,41 @@
+import os
+import threading
+import time
+
+import pytest
+
+from xibless import server
+
+@pytest.fixture
+def socketPath(tmp_path):
+    path = str(tmp_path / 'xibless.sock')
+    thread = threading.Thread(target=server.serve, args=(path,))
+    thread.daemon = True
+    thread.start()
+    for _ in range(100):
+        if os.path.exists(path):
+            break
+        time.sleep(0.05)
+    return path
+
+def writeScript(tmp_path, name, code):
+    path = tmp_path / name
+    path.write_text(code)
+    return str(path)
+
+def compileWindow(tmp_path, socketPath):
+    source = writeScript(tmp_path, 'ui.py', 'result = Window(300, 200, "Window")\n')
+    dest = str(tmp_path / 'ui.m')
+    server.compileRemote(source, dest, socketPath)
+    return os.path.exists(dest)
+
+def test_compile(tmp_path, socketPath):
+    assert compileWindow(tmp_path, socketPath)
+
+def test_script_exiting_is_a_compilation_error(tmp_path, socketPath):
+    source = writeScript(tmp_path, 'exits.py', 'import sys\nsys.exit(1)\n')
+    with pytest.raises(RuntimeError) as excinfo:
+        server.compileRemote(source, str(tmp_path / 'exits.m'), socketPath)
+    assert 'SystemExit' in str(excinfo.value)
+    # The server is still there for the next compilation.
+    assert compileWindow(tmp_path, socketPath)
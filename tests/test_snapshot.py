@@ -0,0 +1,18 @@
+import sys
+
+import xibless
+
+def snapshot(monkeypatch, source, dest):
+    monkeypatch.setattr(sys, 'argv', ['xibless', 'snapshot', str(source), str(dest)])
+    return xibless.main()
+
+def test_snapshot(tmp_path, monkeypatch):
+    (tmp_path / 'ui.py').write_text('result = Window(300, 200, "Window")\n')
+    assert not snapshot(monkeypatch, tmp_path, tmp_path / 'snapshot.jsonl')
+
+def test_snapshot_fails_when_a_script_fails(tmp_path, monkeypatch):
+    (tmp_path / 'ui.py').write_text('result = Window(300, 200, "Window")\n')
+    (tmp_path / 'broken.py').write_text('result = Window(\n')
+    assert snapshot(monkeypatch, tmp_path, tmp_path / 'snapshot.jsonl')
+    # The scripts that worked are still snapshotted.
+    assert '"class":"Window"' in (tmp_path / 'snapshot.jsonl').read_text()
@@ -0,0 +1,38 @@
+import re
+
+import xibless
+
+def generate(tmp_path, script, **options):
+    path = tmp_path / 'ui.py'
+    path.write_text(script)
+    return xibless.generateCode(str(path), 'ui', **options).unit
+
+def builderBodies(code):
+    # The code of the lazy toolbar item builders of `code`.
+    return re.findall(r'builder:\^NSToolbarItem \*\{\n(.*?)\n\s*\}\];', code, re.DOTALL)
+
+SHARED_FONT = """
+result = Window(300, 200, "Window")
+font = Font("Verdana", 12)
+toolbar = result.createToolbar("main")
+toolbar.lazyItems = True
+item = toolbar.addItem("search", "Search")
+item.view = Label(None, text="In toolbar")
+item.view.font = font
+label = Label(result, text="In window")
+label.font = font
+"""
+
+def test_lazy_item_builds_its_views_in_builder(tmp_path):
+    code = generate(tmp_path, SHARED_FONT.replace('label.font = font\n', ''))
+    [body] = builderBodies(code)
+    assert 'NSToolbarItem *' in body
+    assert 'NSFont *' in body
+
+def test_lazy_item_dependency_shared_with_window_is_created_before_builder(tmp_path):
+    code = generate(tmp_path, SHARED_FONT)
+    [body] = builderBodies(code)
+    assert 'NSToolbarItem *' in body
+    assert 'NSFont *' not in body
+    assert code.index('NSFont *font;') < code.index('builder:^')
+    assert 'setFont:font]' in body
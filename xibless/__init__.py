@@ -1,26 +1,144 @@
 from __future__ import print_function
 
-from argparse import ArgumentParser
+__version__ = '0.5.1'
 
-from .gen import generate, runUI
+# We don't import the gen module (and through it, all widget modules) until we actually need it so
+# that the startup of the command line tool stays fast.
+def generate(*args, **kwargs):
+    from .gen import generate
+    return generate(*args, **kwargs)
 
-__version__ = '0.5.1'
+def generateCode(*args, **kwargs):
+    from .gen import generateCode
+    return generateCode(*args, **kwargs)
+
+def generateVariants(*args, **kwargs):
+    from .gen import generateVariants
+    return generateVariants(*args, **kwargs)
+
+def runUI(*args, **kwargs):
+    from .gen import runUI
+    return runUI(*args, **kwargs)
+
+def preview(*args, **kwargs):
+    from .preview import preview
+    return preview(*args, **kwargs)
 
 def main():
+    from argparse import ArgumentParser
     parser = ArgumentParser()
-    parser.add_argument('command', choices=['compile', 'run'],
+    parser.add_argument('command', choices=['compile', 'run', 'preview', 'snapshot', 'snapdiff', 'serve', 'report'],
         help="The command to execute")
-    parser.add_argument('source',
-        help="Path of the UI script to convert")
+    parser.add_argument('source', nargs='?',
+        help="Path of the UI script to convert (a folder of scripts for snapshot, the old snapshot for snapdiff, a report file for report)")
     parser.add_argument('dest', nargs='?',
-        help="Destination path for the resulting Objective-C file (compile only)")
+        help="Destination path for the resulting Objective-C file (compile), SVG image (preview) or snapshot (snapshot). The new snapshot for snapdiff.")
     parser.add_argument('--loc-table', dest='loc_table',
         help="Name of the localization table to use for NSLocalizedStringFromTable().")
+    parser.add_argument('--cache-strings', dest='cache_strings', action='store_true',
+        help="Look localized strings up once, on first use, in a static table.")
+    parser.add_argument('--strings-dir', dest='strings_dir',
+        help="Merge the localized strings in the .strings file of the localization table in this folder.")
+    parser.add_argument('--table-driven', dest='table_driven', action='store_true',
+        help="Emit homogeneous lists of items (segments, columns, menu items) as C arrays and loops.")
+    parser.add_argument('--elide-defaults', dest='elide_defaults', action='store_true',
+        help="Don't generate setters for values that are equal to AppKit's defaults.")
+    parser.add_argument('--arc', action='store_true',
+        help="Generate code meant to be compiled with ARC (no autorelease).")
+    parser.add_argument('--pool-constants', dest='pool_constants', action='store_true',
+        help="Create images, localized strings, arrays and dictionaries used more than once only once.")
+    parser.add_argument('--no-tidy', dest='tidy', action='store_false',
+        help="Don't indent the generated code (faster, for code that is only compiled).")
+    parser.add_argument('--batch-bindings', dest='batch_bindings', action='store_true',
+        help="Apply all bindings at once, from a static table, rather than one statement per binding.")
+    parser.add_argument('--batch-accessibility', dest='batch_accessibility', action='store_true',
+        help="Set the accessibility descriptions of all views at once rather than one call per view.")
+    parser.add_argument('--static-key-view-loop', dest='static_key_view_loop', action='store_true',
+        help="Compute the key view loop of windows from their layout rather than at runtime.")
+    parser.add_argument('--cache-screen-geometry', dest='cache_screen_geometry', action='store_true',
+        help="Position windows with a cached main screen geometry.")
+    parser.add_argument('--split', type=int, dest='split_size',
+        help="Create self-contained parts of the UI holding at least this many items in helper functions.")
+    parser.add_argument('--split-files', dest='split_files', action='store_true',
+        help="With --split, put the helper functions in separate units (<dest>Part<n>.m).")
+    parser.add_argument('--report',
+        help="Append the size and cost of the generated code, per item, to this report file (compile only).")
+    parser.add_argument('--tolerance', type=float, default=0,
+        help="Frame differences (in points) that snapdiff ignores.")
+    parser.add_argument('--server', action='store_true',
+        help="Forward the compile request to a server started with 'xibless serve' (compile locally if there's none).")
+    parser.add_argument('--socket',
+        help="Path of the Unix socket of the compile server (serve and --server).")
     args = parser.parse_args()
+    if args.command == 'serve':
+        from .server import serve
+        serve(args.socket)
+        return 0
+    if not args.source:
+        print("The {} command requires a <source> argument.".format(args.command))
+        return 1
     if args.command == 'compile':
         if not args.dest:
             print("The compile command requires a <dest> argument.")
             return 1
-        generate(args.source, args.dest, localizationTable=args.loc_table)
+        options = dict(localizationTable=args.loc_table, tableDriven=args.table_driven,
+            elideDefaults=args.elide_defaults, arc=args.arc, poolConstants=args.pool_constants,
+            cacheStrings=args.cache_strings, tidy=args.tidy, splitSize=args.split_size,
+            splitFiles=args.split_files, batchBindings=args.batch_bindings,
+            batchAccessibility=args.batch_accessibility, staticKeyViewLoop=args.static_key_view_loop,
+            cacheScreenGeometry=args.cache_screen_geometry)
+        # The compile server doesn't share our working directory.
+        import os.path
+        if args.report:
+            options['report'] = os.path.abspath(args.report)
+        if args.strings_dir:
+            options['stringsFolder'] = os.path.abspath(args.strings_dir)
+        elided = None
+        if args.server:
+            from .server import compileRemote
+            try:
+                elided = compileRemote(args.source, args.dest, args.socket, **options)
+            except EnvironmentError:
+                pass # No server, we compile locally
+            except RuntimeError as e:
+                print(e)
+                return 1
+        if elided is None:
+            generate(args.source, args.dest, **options)
+            from . import globalvars
+            elided = globalvars.globalGenerationCounter.elidedSetterCount
+        if args.elide_defaults:
+            print("{} redundant setter(s) elided.".format(elided))
+    elif args.command == 'preview':
+        if not args.dest:
+            print("The preview command requires a <dest> argument.")
+            return 1
+        preview(args.source, args.dest)
+    elif args.command == 'snapshot':
+        import sys
+        from .snapshot import findScripts, writeSnapshots
+        if args.dest:
+            with open(args.dest, 'wt') as fp:
+                errorCount = writeSnapshots(findScripts(args.source), fp)
+        else:
+            errorCount = writeSnapshots(findScripts(args.source), sys.stdout)
+        if errorCount:
+            print("{} script(s) couldn't be snapshotted.".format(errorCount), file=sys.stderr)
+            return 1
+    elif args.command == 'snapdiff':
+        from .snapshot import diffSnapshotFiles
+        if not args.dest:
+            print("The snapdiff command requires a <dest> argument.")
+            return 1
+        differ = False
+        for script, differences in diffSnapshotFiles(args.source, args.dest, args.tolerance):
+            differ = True
+            print(script)
+            for difference in differences:
+                print("    " + difference)
+        return 1 if differ else 0
+    elif args.command == 'report':
+        from .report import printReportSummary
+        printReportSummary(args.source)
     else:
         runUI(args.source)
@@ -1,8 +1,9 @@
 import re
+from collections import OrderedDict
 
 from .types import (convertValueToObjc, KeyValueId, ConstGenerator, NLSTR, Binding,
     generateDictionary)
-from .property import Property
+from .property import Property, splitPropertyKey
 from . import globalvars
 
 def upFirstLetter(s):
@@ -46,12 +47,76 @@ NSApp = KeyValueId(None, 'NSApp')
 const = ConstGenerator()
 defaults = KeyValueId(None, 'NSUserDefaultsController').sharedUserDefaultsController
 
+# In table-driven mode, we only bother with a loop when there are at least this many items.
+TABLE_DRIVEN_MIN_ITEMS = 2
+
+def generateArrayLoop(arrays, body):
+    # Generates a C loop over a set of C arrays. `arrays` is a list of (ctype, name, values) where
+    # `values` are already converted to objc and all have the same length. In `body`, the current
+    # index is `_i`. We don't use CodeTemplate here because `body` usually contains placeholders
+    # that are meant to be replaced by the template of the calling item.
+    count = len(arrays[0][2])
+    declarations = []
+    for ctype, name, values in arrays:
+        assert len(values) == count
+        if not ctype.endswith('*'):
+            ctype += ' '
+        declarations.append("%s%s[] = {\n%s\n};" % (ctype, name, ', '.join(values)))
+    return "{\n%s\nNSInteger _i;\nfor (_i=0; _i<%d; _i++) {\n%s}\n}\n" % (
+        '\n'.join(declarations), count, body)
+
+def generateBindingBatch(bindings):
+    # Code applying `bindings`, a list of (object, name, target, keyPath, options) tuples, with
+    # applyBindings() from XiblessSupport. Names and key paths are string literals and go in a static
+    # descriptor array. Objects, targets and options dictionaries go, only once each, in an array
+    # of objects to which the descriptors refer by index. Objects and targets are either items,
+    # which are told apart by identity (two items can have the same varname in different scopes),
+    # or code.
+    objects = []
+    indexes = {}
+    def objectIndex(value):
+        if isinstance(value, GeneratedItem):
+            expression = value.varname
+        else:
+            expression = value
+            if expression == 'nil':
+                return -1
+        if value not in indexes:
+            indexes[value] = len(objects)
+            objects.append(expression)
+        return indexes[value]
+    descriptors = []
+    for obj, name, target, keyPath, options in bindings:
+        descriptors.append("{%d, %s, %d, %s, %d}" % (objectIndex(obj), name, objectIndex(target),
+            keyPath, objectIndex(options)))
+    return "{\nstatic const XiblessBinding _bindings[] = {\n%s\n};\nid _bindingObjects[] = {\n%s\n};\napplyBindings(_bindings, %d, _bindingObjects);\n}\n" % (
+        ',\n'.join(descriptors), ',\n'.join(objects), len(descriptors))
+
+def generateAccessibilityBatch(descriptions):
+    # Code setting `descriptions`, a list of (object, description) code tuples, with a single
+    # setAccessibilityDescriptions() call.
+    return "{\nid _accessibilityObjects[] = {\n%s\n};\nNSString *_accessibilityDescriptions[] = {\n%s\n};\nsetAccessibilityDescriptions(_accessibilityObjects, _accessibilityDescriptions, %d);\n}\n" % (
+        ',\n'.join(obj for obj, _ in descriptions), ',\n'.join(desc for _, desc in descriptions),
+        len(descriptions))
+
+def generateAllocInit(classname, initmethod):
+    # Code creating a new instance of `classname` that we don't own. Without ARC, it's
+    # autoreleased. With ARC, no autorelease is needed and we avoid pool churn for big UIs.
+    result = "[[%s alloc] %s]" % (classname, initmethod)
+    if not globalvars.globalARC:
+        result = "[%s autorelease]" % result
+    return result
+
 class GeneratedItem(object):
     OBJC_CLASS = 'NSObject'
     # This is a shorthand for setting the self.properties dictionary with the value of the prop in
     # generateInit(). This list contains either Property instances or, to avoid unnecessary
     # verbosity, a string with the property name, which is the equivalent of Property(name).
     PROPERTIES = []
+    # Mapping of property keys (as they are in self.properties) to the value AppKit gives them
+    # when OBJC_CLASS is created. When globalElideDefaults is set, setters for these values are
+    # skipped. Only put values in there that are documented defaults for the class' init method.
+    COCOA_DEFAULTS = {}
     
     def __init__(self):
         globalvars.globalGenerationCounter.register(self)
@@ -60,30 +125,56 @@ class GeneratedItem(object):
         # a "[$varname$ setEditable:NO];" statement will be generated.
         self.properties = {}
         self._bindings = []
+        # KeyValueId instances self was assigned to, in assignment order. OrderedDict is used as an
+        # ordered set.
+        self._assignments = None
     
     #--- Private
+    @classmethod
+    def _compiledProperties(cls):
+        # PROPERTIES with its string elements converted to Property instances. We cache the result
+        # in the class' own __dict__ (getattr() would return the cache of a superclass) because
+        # every subclass has its own PROPERTIES.
+        result = cls.__dict__.get('_COMPILED_PROPERTIES')
+        if result is None:
+            result = []
+            for prop in cls.PROPERTIES:
+                if not isinstance(prop, Property):
+                    assert isinstance(prop, str)
+                    prop = Property(prop)
+                result.append(prop)
+            result = tuple(result)
+            cls._COMPILED_PROPERTIES = result
+        return result
+    
+    def _collectProperties(self):
+        # Fills self.properties with the values of the attributes described in PROPERTIES.
+        for prop in self._compiledProperties():
+            prop.setOnTarget(self)
+    
     def _generateProperties(self, properties=None):
         result = ''
         if properties is None:
             properties = self.properties
-            for prop in self.PROPERTIES:
-                if not isinstance(prop, Property):
-                    assert isinstance(prop, str)
-                    prop = Property(prop)
-                prop.setOnTarget(self)
+            self._collectProperties()
+        elideDefaults = globalvars.globalElideDefaults
+        cocoaDefaults = self.COCOA_DEFAULTS
+        selfAccessor = self.accessor
         for key, value in properties.items():
             if value is None:
                 continue
-            dot_elements = key.split('.')
-            accessor = self.accessor
-            for dot_element in dot_elements[:-1]:
-                accessor = getattr(accessor, dot_element)
+            if elideDefaults and key in cocoaDefaults and value == cocoaDefaults[key]:
+                globalvars.globalGenerationCounter.elidedSetterCount += 1
+                continue
+            path, name, methname = splitPropertyKey(key)
+            accessor = selfAccessor
+            for element in path:
+                accessor = getattr(accessor, element)
             if isinstance(value, GeneratedItem) and not value.generated:
                 # Generate an assignment (which is generated by the "value" part of the assignment)
                 # so that we set that value after our target item was generated
-                setattr(accessor, dot_elements[-1], value)
+                setattr(accessor, name, value)
             else:
-                methname = 'set' + upFirstLetter(dot_elements[-1])
                 result += accessor._callMethod(methname, value)
         return result
     
@@ -92,7 +183,7 @@ class GeneratedItem(object):
         tmpl = CodeTemplate("$allocinit$\n$setup$\n$setprop$\n")
         tmpl.varname = self.varname
         tmpl.classname = self.OBJC_CLASS
-        tmpl.allocinit = "$classname$ *$varname$ = [[[$classname$ alloc] $initmethod$] autorelease];"
+        tmpl.allocinit = "$classname$ *$varname$ = %s;" % generateAllocInit('$classname$', '$initmethod$')
         tmpl.initmethod = "init"
         tmpl.setup = ''
         return tmpl
@@ -130,11 +221,36 @@ class GeneratedItem(object):
     def objcValue(self):
         return self.varname
     
+    def _addAssignment(self, key):
+        if self._assignments is None:
+            self._assignments = OrderedDict()
+        self._assignments[key] = None
+    
+    def _removeAssignment(self, key):
+        self._assignments.pop(key, None)
+    
+    def _activeAssignments(self):
+        # In runmode, the owner is nil, so assignments to it (or to its attributes) are skipped.
+        if not self._assignments:
+            return []
+        if not globalvars.globalRunMode:
+            return list(self._assignments)
+        return [key for key in self._assignments if key._root() is not owner]
+    
+    def hasAssignments(self):
+        return bool(self._activeAssignments())
+    
+    def canBeTableDriven(self):
+        # Items that are referred to elsewhere (assignments, bindings) need their own variable and
+        # thus can't be generated inside a table-driven loop.
+        return not (self._bindings or self.hasAssignments())
+    
     def generateAssignments(self):
-        if self not in KeyValueId.VALUE2KEYS:
+        keys = self._activeAssignments()
+        if not keys:
             return ""
         assignments = []
-        for key in KeyValueId.VALUE2KEYS[self]:
+        for key in keys:
             setmethod = 'set' + upFirstLetter(key._name)
             assignment = key._parent._callMethod(setmethod, self)
             assignments.append(assignment)
@@ -142,6 +258,7 @@ class GeneratedItem(object):
     
     def generateBindings(self):
         bindings = []
+        batch = globalvars.globalBatchedBindings
         for binding in self._bindings:
             method = '[{} bind:{} toObject:{} withKeyPath:{} options:{}];'
             if binding.options:
@@ -151,18 +268,38 @@ class GeneratedItem(object):
             name = convertValueToObjc(binding.name)
             target = convertValueToObjc(binding.target)
             keyPath = convertValueToObjc(binding.keyPath)
-            bindings.append(method.format(self.varname, name, target, keyPath, options))
+            if batch is not None:
+                if isinstance(binding.target, GeneratedItem):
+                    target = binding.target
+                batch.append((self, name, target, keyPath, options))
+            else:
+                bindings.append(method.format(self.varname, name, target, keyPath, options))
         return '\n'.join(bindings)
     
     def generateFinalize(self):
         # Called after everything has been generated.
         pass
     
+    def generateCompletion(self):
+        # Called after generateFinalize() was called for every item.
+        pass
+    
     def generate(self, *args, **kwargs):
         result = ''
-        for dependency in self.dependencies():
-            if isinstance(dependency, GeneratedItem) and not dependency.generated:
-                result += dependency.generate()
+        schedule = scheduleGeneration([self])
+        # The last item of the schedule is self (unless self is already generated).
+        for dependency in schedule[:-1]:
+            if not dependency.generated:
+                result += dependency._generate()
+        result += self._generate(*args, **kwargs)
+        return result
+    
+    def _generate(self, *args, **kwargs):
+        # Generates the code for self alone. Dependencies have to be generated already.
+        report = globalvars.globalCodeReport
+        if report is not None:
+            report.enter(self)
+        result = ''
         inittmpl = self.generateInit(*args, **kwargs)
         inittmpl.setprop = self._generateProperties()
         result += inittmpl.render()
@@ -172,14 +309,60 @@ class GeneratedItem(object):
             # aren't actually connected to something.
             result += self.generateBindings()
         globalvars.globalGenerationCounter.addGenerated(self)
+        if report is not None:
+            report.leave(self, result)
         return result
     
 
+def _describeItem(item):
+    return '{} ({})'.format(item.varname, item.__class__.__name__)
+
+def scheduleGeneration(items):
+    # Returns `items` and their (recursive) dependencies in the order in which they have to be
+    # generated, that is, with every item coming after its dependencies. The order is the one of a
+    # depth-first traversal of `items` and of each item's dependencies() and is thus stable.
+    # Already generated items, and the items they depend on, are skipped. We don't use recursion so
+    # that deep hierarchies don't hit the recursion limit.
+    VISITING, DONE = 1, 2
+    states = {}
+    result = []
+    for root in items:
+        if not isinstance(root, GeneratedItem) or root in states or root.generated:
+            continue
+        states[root] = VISITING
+        stack = [(root, iter(root.dependencies()))]
+        while stack:
+            item, dependencies = stack[-1]
+            for dependency in dependencies:
+                if not isinstance(dependency, GeneratedItem) or dependency.generated:
+                    continue
+                state = states.get(dependency)
+                if state is None:
+                    states[dependency] = VISITING
+                    stack.append((dependency, iter(dependency.dependencies())))
+                    break
+                elif state == VISITING:
+                    cycle = [i for i, _ in stack]
+                    cycle = cycle[cycle.index(dependency):] + [dependency]
+                    raise ValueError("There's a dependency cycle between generated items: {}".format(
+                        ' -> '.join(_describeItem(i) for i in cycle)))
+            else:
+                stack.pop()
+                states[item] = DONE
+                result.append(item)
+    return result
+
+
 class GenerationCounter(object):
     def __init__(self):
         self.varnameTokenCounter = 0
         self.createdItems = []
         self.generatedItems = set()
+        # Items whose generateFinalize() code was already generated elsewhere than at the end of
+        # the unit (in a lazy toolbar item builder, for example).
+        self.finalizedItems = set()
+        # Number of setters that weren't generated because of globalElideDefaults.
+        self.elidedSetterCount = 0
     
     def register(self, item):
         self.createdItems.append(item)
@@ -195,12 +378,20 @@ class GenerationCounter(object):
     def isGenerated(self, item):
         return item in self.generatedItems
     
+    def addFinalized(self, item):
+        self.finalizedItems.add(item)
+    
+    def isFinalized(self, item):
+        return item in self.finalizedItems
+    
     def reset(self):
         for item in set(self.createdItems) | self.generatedItems:
             item.varname = None
         self.varnameTokenCounter = 0
         self.createdItems = []
         self.generatedItems = set()
+        self.finalizedItems = set()
+        self.elidedSetterCount = 0
     
 
 globalvars.globalGenerationCounter = GenerationCounter()
\ No newline at end of file
@@ -1,4 +1,4 @@
-from .control import Control, ControlHeights, ControlSize
+from .control import Control, ControlHeights, ControlSize, TextPaddings
 from .base import const
 from .types import NLSTR
 from .property import ImageProperty, KeyShortcutProperty
@@ -11,6 +11,9 @@ class Button(Control):
     OBJC_CLASS = 'NSButton'
     PROPERTIES = Control.PROPERTIES + ['imagePosition', ImageProperty('image'),
         KeyShortcutProperty('shortcut'), 'bordered']
+    COCOA_DEFAULTS = dict(Control.COCOA_DEFAULTS, bezelStyle=const.NSRoundedBezelStyle,
+        bordered=True)
+    TEXT_PADDINGS = TextPaddings(32, 28, 22)
     
     def __init__(self, parent, title, action=None):
         self._bezelStyle = const.NSRoundedBezelStyle
@@ -133,6 +136,9 @@ class Button(Control):
                 return 10
         return Control.outerMargin(self, other, side)
     
+    def _textsToFit(self):
+        return [self.title]
+    
     def generateInit(self):
         tmpl = Control.generateInit(self)
         self.properties['title'] = self.title
@@ -146,6 +152,8 @@ class Button(Control):
 
 class Checkbox(Button):
     CONTROL_HEIGHTS = ControlHeights(14, 12, 10)
+    # The box and the space between it and the title.
+    TEXT_PADDINGS = TextPaddings(24, 21, 18)
     
     def __init__(self, parent, title):
         Button.__init__(self, parent, title)
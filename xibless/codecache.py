@@ -0,0 +1,78 @@
+import sys
+import os
+import os.path as op
+import marshal
+import hashlib
+
+# UI scripts can be big and we often execute the same scripts over and over (once per build). To
+# avoid re-parsing and re-compiling them every time, we cache their compiled code in a
+# __pycache__ folder next to them, much like Python does for modules. The cache file begins with
+# the interpreter's magic number (marshal formats aren't compatible across versions) and the hash
+# of the source it was compiled from.
+
+try:
+    from importlib.util import MAGIC_NUMBER
+except ImportError: # python 2
+    import imp
+    MAGIC_NUMBER = imp.get_magic()
+
+try:
+    CACHE_TAG = sys.implementation.cache_tag
+except AttributeError: # python 2
+    CACHE_TAG = 'python%d%d' % sys.version_info[:2]
+
+CACHE_FOLDER = '__pycache__'
+CACHE_EXT = '.xibless'
+
+def cachePath(scriptPath):
+    folder, filename = op.split(op.abspath(scriptPath))
+    name = op.splitext(filename)[0]
+    return op.join(folder, CACHE_FOLDER, '{}.{}{}'.format(name, CACHE_TAG, CACHE_EXT))
+
+def _compileSource(source, scriptPath):
+    if sys.version_info[0] >= 3:
+        source = source.decode('utf-8')
+    return compile(source + '\n', scriptPath, 'exec', dont_inherit=True)
+
+def _readCache(path, header):
+    try:
+        with open(path, 'rb') as fp:
+            data = fp.read()
+    except EnvironmentError:
+        return None
+    if not data.startswith(header):
+        return None
+    try:
+        return marshal.loads(data[len(header):])
+    except (ValueError, EOFError, TypeError):
+        return None
+
+def _writeCache(path, header, code):
+    # We write in a temporary file first so that a concurrent build never reads a partial cache.
+    # Failing to write the cache isn't an error: we just compile again next time.
+    import tempfile # slow to import and only needed on cache misses
+    try:
+        folder = op.dirname(path)
+        if not op.exists(folder):
+            os.makedirs(folder)
+        fd, tmpPath = tempfile.mkstemp(dir=folder)
+        with os.fdopen(fd, 'wb') as fp:
+            fp.write(header)
+            fp.write(marshal.dumps(code))
+        os.rename(tmpPath, path)
+    except EnvironmentError:
+        pass
+
+def loadScriptCode(scriptPath, useCache=True):
+    """Returns the compiled code of the UI script at scriptPath, using the cache if useCache."""
+    with open(scriptPath, 'rb') as fp:
+        source = fp.read()
+    if not useCache:
+        return _compileSource(source, scriptPath)
+    header = MAGIC_NUMBER + hashlib.sha1(source).digest()
+    path = cachePath(scriptPath)
+    code = _readCache(path, header)
+    if code is None:
+        code = _compileSource(source, scriptPath)
+        _writeCache(path, header, code)
+    return code
@@ -3,6 +3,7 @@ from .textfield import TextField
 
 class Combobox(TextField):
     OBJC_CLASS = 'NSComboBox'
+    COCOA_DEFAULTS = dict(TextField.COCOA_DEFAULTS, completes=False)
     
     def __init__(self, parent, items=None):
         TextField.__init__(self, parent, "")
@@ -6,6 +6,7 @@ from .property import Property, ActionProperty
 from .font import Font, FontFamily, FontSize
 
 ControlHeights = namedtuple('ControlHeights', 'regular small mini')
+TextPaddings = namedtuple('TextPaddings', 'regular small mini')
 
 class ControlSize(object):
     Regular = const.NSRegularControlSize
@@ -21,10 +22,16 @@ class TextAlignment(object):
     
 class Control(View):
     CONTROL_HEIGHTS = ControlHeights(20, 17, 14)
+    # Horizontal space, in the frame rect, that the control takes in addition to its text. Used by
+    # fitToText(). None means that the control doesn't support it.
+    TEXT_PADDINGS = None
     PROPERTIES = View.PROPERTIES + [
         ActionProperty('action'), 'font', Property('controlSize', 'cell.controlSize'), 'formatter',
         'alignment'
     ]
+    COCOA_DEFAULTS = dict(View.COCOA_DEFAULTS, **{
+        'cell.controlSize': const.NSRegularControlSize,
+    })
     
     def __init__(self, parent, width, height):
         View.__init__(self, parent, width, height)
@@ -71,6 +78,29 @@ class Control(View):
         self._controlSize = value
         self._updateControlSize()
     
+    def _textsToFit(self):
+        # The texts that fitToText() makes the control wide enough for.
+        return []
+    
+    def fitToText(self):
+        # Sets our width so that our text fits in it, using approximate font metrics. This has to
+        # be called before the layout methods, like a manual width setting.
+        from .metrics import textWidth
+        if self.TEXT_PADDINGS is None:
+            raise TypeError("{} can't be fitted to its text".format(self.__class__.__name__))
+        if self.controlSize == ControlSize.Mini:
+            padding = self.TEXT_PADDINGS.mini
+        elif self.controlSize == ControlSize.Small:
+            padding = self.TEXT_PADDINGS.small
+        else:
+            padding = self.TEXT_PADDINGS.regular
+        lines = []
+        for text in self._textsToFit():
+            if text:
+                lines += getattr(text, 'value', text).split('\n')
+        maxWidth = max([textWidth(line, self.font) for line in lines] or [0])
+        self.width = maxWidth + padding - self.layoutDeltaW
+    
     def dependencies(self):
         return View.dependencies(self) + [self.font, self.formatter]
     
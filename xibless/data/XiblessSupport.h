@@ -1,15 +1,48 @@
 #import <Cocoa/Cocoa.h>
 
+#ifndef __has_feature
+#define __has_feature(x) 0
+#endif
+
+/* Struct members can't hold strong references with ARC. */
+#if __has_feature(objc_arc)
+#define XIBLESS_UNRETAINED __unsafe_unretained
+#else
+#define XIBLESS_UNRETAINED
+#endif
+
+typedef NSToolbarItem* (^XiblessToolbarItemBuilder)(void);
+
 @interface XiblessToolbarDelegate : NSObject <NSToolbarDelegate>
 {
     NSMutableDictionary *items;
+    NSMutableDictionary *builders;
+    NSMutableArray *itemIdentifiers;
+    NSArray *allowedItemIdentifiers;
     NSArray *defaultItems;
 }
 
 - (void)addItem:(NSToolbarItem *)aItem;
+- (void)addItemWithIdentifier:(NSString *)aIdentifier builder:(XiblessToolbarItemBuilder)aBuilder;
 - (void)setDefaultItems:(NSArray *)aDefaultItems;
 @end
 
+/* A binding applied by applyBindings(). object, target and options are indexes in its objects
+   array (-1 for nil options). */
+typedef struct {
+    NSInteger object;
+    XIBLESS_UNRETAINED NSString *binding;
+    NSInteger target;
+    XIBLESS_UNRETAINED NSString *keyPath;
+    NSInteger options;
+} XiblessBinding;
+
 NSString* stringFromChar(unichar c);
+void applyBindings(const XiblessBinding *bindings, NSInteger count, __strong id *objects);
 void setAccessibilityDescription(id obj, NSString *description);
 void setAccessibilityDescriptionOfChild(id obj, NSInteger childIndex, NSString *description);
+/* descriptions[i] is the description of the child at index i, nil ones are skipped. */
+void setAccessibilityDescriptionsOfChildren(id obj, __strong NSString **descriptions, NSInteger count);
+void setAccessibilityDescriptions(__strong id *objects, __strong NSString **descriptions, NSInteger count);
+/* [[NSScreen mainScreen] visibleFrame], cached until the key window or the screens change. */
+NSRect mainScreenVisibleFrame(void);
@@ -1,45 +1,97 @@
 #import "XiblessSupport.h"
 
+/* This unit can be compiled with or without ARC, like units generated with or without --arc. See
+   XiblessSupport.h for __has_feature(). */
+
 @implementation XiblessToolbarDelegate
 - (id)init
 {
     self = [super init];
     items = [[NSMutableDictionary alloc] init];
+    builders = [[NSMutableDictionary alloc] init];
+    itemIdentifiers = [[NSMutableArray alloc] init];
+    allowedItemIdentifiers = nil;
     defaultItems = nil;
     return self;
 }
 
+#if !__has_feature(objc_arc)
 - (void)dealloc
 {
     [items release];
+    [builders release];
+    [itemIdentifiers release];
+    [allowedItemIdentifiers release];
     [defaultItems release];
     [super dealloc];
 }
+#endif
+
+- (void)addItemIdentifier:(NSString *)aIdentifier
+{
+    if ([itemIdentifiers containsObject:aIdentifier]) {
+        return;
+    }
+    [itemIdentifiers addObject:aIdentifier];
+#if !__has_feature(objc_arc)
+    [allowedItemIdentifiers release];
+#endif
+    allowedItemIdentifiers = nil;
+}
 
 - (void)addItem:(NSToolbarItem *)aItem
 {
     [items setObject:aItem forKey:[aItem itemIdentifier]];
+    [self addItemIdentifier:[aItem itemIdentifier]];
+}
+
+/* The item is only created, by calling aBuilder, when the toolbar first asks for it. */
+- (void)addItemWithIdentifier:(NSString *)aIdentifier builder:(XiblessToolbarItemBuilder)aBuilder
+{
+    XiblessToolbarItemBuilder builder = [aBuilder copy];
+    [builders setObject:builder forKey:aIdentifier];
+#if !__has_feature(objc_arc)
+    [builder release];
+#endif
+    [self addItemIdentifier:aIdentifier];
 }
 
 - (void)setDefaultItems:(NSArray *)aDefaultItems
 {
+#if __has_feature(objc_arc)
+    defaultItems = aDefaultItems;
+#else
     [defaultItems release];
     defaultItems = [aDefaultItems retain];
+#endif
 }
 
 - (NSToolbarItem *)toolbar:(NSToolbar *)toolbar itemForItemIdentifier:(NSString *)itemIdentifier willBeInsertedIntoToolbar:(BOOL)flag
 {
-    return [items objectForKey:itemIdentifier];
+    NSToolbarItem *result = [items objectForKey:itemIdentifier];
+    if (result == nil) {
+        XiblessToolbarItemBuilder builder = [builders objectForKey:itemIdentifier];
+        if (builder != nil) {
+            result = builder();
+            [items setObject:result forKey:itemIdentifier];
+            /* The builder, and what it holds, isn't needed anymore. */
+            [builders removeObjectForKey:itemIdentifier];
+        }
+    }
+    return result;
 }
 
 - (NSArray *)toolbarAllowedItemIdentifiers:(NSToolbar *)toolbar
 {
-    NSMutableArray *result = [NSMutableArray array];
-    [result addObject:NSToolbarSeparatorItemIdentifier];
-    [result addObject:NSToolbarSpaceItemIdentifier];
-    [result addObject:NSToolbarFlexibleSpaceItemIdentifier];
-    [result addObjectsFromArray:[items allKeys]];
-    return result;
+    if (allowedItemIdentifiers == nil) {
+        NSMutableArray *result = [NSMutableArray array];
+        [result addObject:NSToolbarSeparatorItemIdentifier];
+        [result addObject:NSToolbarSpaceItemIdentifier];
+        [result addObject:NSToolbarFlexibleSpaceItemIdentifier];
+        [result addObjectsFromArray:itemIdentifiers];
+        allowedItemIdentifiers = [result copy];
+    }
+    return allowedItemIdentifiers;
 }
 
 - (NSArray *)toolbarDefaultItemIdentifiers:(NSToolbar *)toolbar
@@ -53,6 +105,17 @@ NSString* stringFromChar(unichar c)
     return [NSString stringWithCharacters:&c length:1];
 }
 
+void applyBindings(const XiblessBinding *bindings, NSInteger count, __strong id *objects)
+{
+    NSInteger i;
+    for (i=0; i<count; i++) {
+        const XiblessBinding *binding = &bindings[i];
+        NSDictionary *options = binding->options >= 0 ? objects[binding->options] : nil;
+        [objects[binding->object] bind:binding->binding toObject:objects[binding->target]
+            withKeyPath:binding->keyPath options:options];
+    }
+}
+
 void setAccessibilityDescription(id obj, NSString *description)
 {
     id accessibilityObject = NSAccessibilityUnignoredDescendant(obj);
@@ -72,3 +135,54 @@ void setAccessibilityDescriptionOfChild(id obj, NSInteger childIndex, NSString *
     id child = [children objectAtIndex:childIndex];
     [child accessibilitySetOverrideValue:description forAttribute:NSAccessibilityDescriptionAttribute];
 }
+
+void setAccessibilityDescriptionsOfChildren(id obj, __strong NSString **descriptions, NSInteger count)
+{
+    id accessibilityObject = NSAccessibilityUnignoredDescendant(obj);
+    NSArray *children = [accessibilityObject accessibilityAttributeValue:NSAccessibilityChildrenAttribute];
+    
+    if (count > [children count]) {
+        NSLog(@"More descriptions than children in setAccessibilityDescriptionsOfChildren");
+        count = [children count];
+    }
+    
+    NSInteger i;
+    for (i=0; i<count; i++) {
+        if (descriptions[i] != nil) {
+            id child = [children objectAtIndex:i];
+            [child accessibilitySetOverrideValue:descriptions[i] forAttribute:NSAccessibilityDescriptionAttribute];
+        }
+    }
+}
+
+void setAccessibilityDescriptions(__strong id *objects, __strong NSString **descriptions, NSInteger count)
+{
+    NSInteger i;
+    for (i=0; i<count; i++) {
+        setAccessibilityDescription(objects[i], descriptions[i]);
+    }
+}
+
+static NSRect cachedScreenFrame;
+static BOOL screenFrameIsCached = NO;
+
+NSRect mainScreenVisibleFrame(void)
+{
+    static dispatch_once_t onceToken;
+    dispatch_once(&onceToken, ^{
+        /* The main screen is the one of the key window. */
+        NSNotificationCenter *center = [NSNotificationCenter defaultCenter];
+        NSArray *names = [NSArray arrayWithObjects:NSApplicationDidChangeScreenParametersNotification,
+            NSWindowDidBecomeKeyNotification, NSWindowDidChangeScreenNotification, nil];
+        for (NSString *name in names) {
+            [center addObserverForName:name object:nil queue:nil usingBlock:^(NSNotification *notification) {
+                screenFrameIsCached = NO;
+            }];
+        }
+    });
+    if (!screenFrameIsCached) {
+        cachedScreenFrame = [[NSScreen mainScreen] visibleFrame];
+        screenFrameIsCached = YES;
+    }
+    return cachedScreenFrame;
+}
@@ -11,6 +11,7 @@ class NumberStyle(object):
 class NumberFormatter(GeneratedItem):
     OBJC_CLASS = 'NSNumberFormatter'
     PROPERTIES = GeneratedItem.PROPERTIES + ['numberStyle', 'maximumFractionDigits']
+    COCOA_DEFAULTS = dict(GeneratedItem.COCOA_DEFAULTS, numberStyle=NumberStyle.NoStyle)
     
     def __init__(self, numberStyle):
         GeneratedItem.__init__(self)
@@ -1,44 +1,96 @@
+from __future__ import absolute_import
+
 import sys
 import os
+import re
 import os.path as op
-import tempfile
 import shutil
-from subprocess import Popen
+import types
+from collections import namedtuple, OrderedDict
+from importlib import import_module
 from datetime import datetime
 
 from . import globalvars
-from .base import CodeTemplate, GeneratedItem, owner, NSApp, const, defaults
-from .types import Action, NLSTR
-from .control import ControlSize, TextAlignment
-from .view import View, Box, Pack, Size, Rect
-from .font import Font, FontFamily, FontSize, FontTrait
-from .color import Color
-from .formatter import NumberFormatter, NumberStyle
-from .menu import Menu, MainMenu
-from .window import Window, Panel, PanelStyle
-from .button import Button, Checkbox
-from .textfield import TextField, Label, SearchField
-from .textview import TextView
-from .popup import Popup
-from .combo import Combobox
-from .radio import RadioButtons
-from .progress import ProgressIndicator
-from .image import ImageView
-from .tabview import TabView
-from .table import TableView, ListView, OutlineView
-from .splitview import SplitView
-from .segment import SegmentedControl
-from .slider import Slider
-from .layout import HLayout, VLayout, VHLayout
+from .base import (CodeTemplate, GeneratedItem, owner, NSApp, scheduleGeneration,
+    generateBindingBatch, generateAccessibilityBatch)
 from .util import modified_after
+from .codecache import loadScriptCode
+
+# Names that are available in UI scripts, mapped to the module they come from. We don't import
+# widget modules upfront because most scripts only use a few of them and because we don't want a
+# simple "xibless --help" to pay for all of them. See scriptNamespace().
+SCRIPT_NAMES = {
+    'owner': 'base', 'NSApp': 'base', 'const': 'base', 'defaults': 'base',
+    'Action': 'types', 'NLSTR': 'types',
+    'ControlSize': 'control', 'TextAlignment': 'control',
+    'View': 'view', 'Box': 'view', 'Pack': 'view', 'Size': 'view', 'Rect': 'view',
+    'Font': 'font', 'FontFamily': 'font', 'FontSize': 'font', 'FontTrait': 'font',
+    'Color': 'color',
+    'NumberFormatter': 'formatter', 'NumberStyle': 'formatter',
+    'Menu': 'menu', 'MainMenu': 'menu',
+    'Window': 'window', 'Panel': 'window', 'PanelStyle': 'window',
+    'Button': 'button', 'Checkbox': 'button',
+    'TextField': 'textfield', 'Label': 'textfield', 'SearchField': 'textfield',
+    'TextView': 'textview',
+    'Popup': 'popup',
+    'Combobox': 'combo',
+    'RadioButtons': 'radio',
+    'ProgressIndicator': 'progress',
+    'ImageView': 'image',
+    'TabView': 'tabview',
+    'TableView': 'table', 'ListView': 'table', 'OutlineView': 'table',
+    'SplitView': 'splitview',
+    'SegmentedControl': 'segment',
+    'Slider': 'slider',
+    'HLayout': 'layout', 'VLayout': 'layout', 'VHLayout': 'layout',
+}
+
+def _namesInCode(code):
+    # All names referred to by `code` and by the functions and classes it defines. It's a superset of
+    # the global names the code uses because it also includes attribute names, but that's fine.
+    result = set()
+    stack = [code]
+    while stack:
+        code = stack.pop()
+        result.update(code.co_names)
+        stack.extend(c for c in code.co_consts if isinstance(c, types.CodeType))
+    return result
+
+def scriptNamespace(code):
+    # Returns the globals with which the UI script compiled as `code` is executed. Only the modules
+    # of the names the script refers to are imported.
+    result = {}
+    for name in _namesInCode(code) & set(SCRIPT_NAMES):
+        module = import_module('.' + SCRIPT_NAMES[name], __package__)
+        result[name] = getattr(module, name)
+    return result
 
-try:
-    execfile
-except NameError:
-    # We're in Python 3
-    def execfile(file, globals=globals(), locals=locals()):
-        with open(file, "rt", encoding='utf-8') as fh:
-            exec(fh.read()+"\n", globals, locals)
+def runScript(modulePath, args):
+    # Executes the UI script at `modulePath` and returns its locals. Generated items that don't have
+    # an explicit varname are named after the local variable they're assigned to. Every xibless
+    # entry point that runs UI scripts should go through this function.
+    code = loadScriptCode(modulePath)
+    module_globals = scriptNamespace(code)
+    # Some modules create generated items at import time (TextView.DEFAULT_FONT), so we have to
+    # reset the counter *after* having imported them.
+    globalvars.globalGenerationCounter.reset()
+    # Scripts can be executed one after the other in the same process (serve, snapshot). We don't
+    # want assignments made by a previous script, or the owner being nil'ed by a previous runmode
+    # generation, to leak in this one.
+    owner._clear()
+    owner._name = 'owner'
+    NSApp._clear()
+    module_globals['args'] = args
+    module_locals = {}
+    sys.path.insert(0, op.dirname(modulePath))
+    try:
+        exec(code, module_globals, module_locals)
+    finally:
+        del sys.path[0]
+    for key, value in module_locals.items():
+        if isinstance(value, GeneratedItem) and value.varname.startswith('_tmp'):
+            value.varname = key
+    return module_locals
 
 AUTOGEN_COMMENT = "/* This unit was automatically generated by xibless v{version} on {timestamp}. */\n\n" 
 
@@ -49,52 +101,116 @@ $ownerimport$
 $funcsig$;
 """
 
-UNIT_TMPL = """
+UNIT_IMPORTS_TMPL = """
 $mainimport$
 $ownerimport$
 
-$funcsig$
+"""
+
+# The generated function's body goes between UNIT_HEAD_TMPL and UNIT_FOOT. Helper functions, if
+# any, go between the imports and the head.
+UNIT_HEAD_TMPL = """$funcsig$
 {
-$contents$
-return result;
+"""
+
+UNIT_FOOT = """return result;
 }
 """
 
+# The result of generateCode(). `unit` and `header` are the tidied code of the unit and of its header
+# (None if there's no header), without the autogen comment. `funcsig` is the signature of the
+# function building the UI, `result` is the script's resulting item and `items` are all items that
+# were created by the script, in creation order. Their dependencies() form the item graph. `costs`
+# is a list of report.ItemCost if a report was asked for, None otherwise. `strings` are the sorted
+# strings (escaped as in the code) that the unit localizes, empty if there's no localization table.
+# `parts` is a list of (name, code) of the units that were split from the main one (see split.py).
+GenerationResult = namedtuple('GenerationResult', 'unit header funcsig result items costs strings parts')
+
+def localizedStringsLookup(strings, table):
+    # With globalCacheStrings, localized strings are referred to as `_localizedStrings[index]`.
+    # This is the code, at the top of the generated function, declaring that static table and
+    # filling it, in a single pass, the first time the function is called. Without ARC, the
+    # strings have to be retained because the table outlives the autorelease pool.
+    keys = ', '.join('@"%s"' % s for s in strings)
+    lookup = '[_bundle localizedStringForKey:_keys[_i] value:@"" table:@"%s"]' % table
+    if not globalvars.globalARC:
+        lookup = '[%s retain]' % lookup
+    return (
+        "static NSString *_localizedStrings[%d];\n"
+        "static dispatch_once_t _localizedStringsOnce;\n"
+        "dispatch_once(&_localizedStringsOnce, ^{\n"
+        "NSString *_keys[] = {\n%s\n};\n"
+        "NSBundle *_bundle = [NSBundle mainBundle];\n"
+        "NSInteger _i;\n"
+        "for (_i=0; _i<%d; _i++) {\n"
+        "_localizedStrings[_i] = %s;\n"
+        "}\n"
+        "});\n"
+    ) % (len(strings), keys, len(strings), lookup)
+
+class _GraphState(object):
+    # Generating code mutates the items being generated: their properties are collected, temporary
+    # varnames are given, assignments are added and items are marked as generated. To generate more
+    # than one variant from a single script execution, we capture the state of the items after the
+    # execution and restore it before each generation.
+    def __init__(self, counter):
+        self.counter = counter
+        self.varnameToken = counter.varnameTokenCounter
+        self.createdCount = len(counter.createdItems)
+        self.items = [
+            (item, item._varname, dict(item.properties),
+                OrderedDict(item._assignments) if item._assignments is not None else None,
+                item.__dict__.get('OBJC_CLASS'))
+            for item in counter.createdItems
+        ]
+    
+    def restore(self):
+        counter = self.counter
+        counter.varnameTokenCounter = self.varnameToken
+        # Items created during the generation aren't part of the script's graph.
+        del counter.createdItems[self.createdCount:]
+        counter.generatedItems = set()
+        counter.finalizedItems = set()
+        counter.elidedSetterCount = 0
+        for item, varname, properties, assignments, objcClass in self.items:
+            item._varname = varname
+            item.properties = dict(properties)
+            item._assignments = OrderedDict(assignments) if assignments is not None else None
+            if objcClass is not None:
+                item.OBJC_CLASS = objcClass
+            else:
+                item.__dict__.pop('OBJC_CLASS', None)
+    
+
 # When running a UI (in `runmode`), we take one UI script out of its context, so
 # any owner assignment will make code compilation fail. Since we just want to preview the UI, we
-# don't need those assignments, so we skip them. Moreover, we revert all instance which had their
-# OBJC_CLASS attribute set because this is also going to make complication fail.
-def generate(modulePath, dest, runmode=False, localizationTable=None, args=None):
-    if args is None:
-        args = {}
-    dest_basename, dest_ext = op.splitext(op.basename(dest))
-    if dest_ext == '.h':
-        dest_header = None
-    else:
-        if not dest_ext:
-            dest += '.m'
-        dest_header = op.splitext(dest)[0] + '.h'
+# don't need those assignments, so we skip them (see GeneratedItem._activeAssignments()).
+# Moreover, we revert all instance which had their OBJC_CLASS attribute set because this is also
+# going to make complication fail.
+def _generateCode(module_locals, name, header=True, runmode=False, localizationTable=None,
+        tableDriven=False, elideDefaults=False, arc=False, poolConstants=False, report=False,
+        cacheStrings=False, tidy=True, splitSize=None, splitFiles=False, batchBindings=False,
+        batchAccessibility=False, staticKeyViewLoop=False,
+        cacheScreenGeometry=False):
+    # Generates the code for the already executed script which has `module_locals` as locals.
     globalvars.globalLocalizationTable = localizationTable
     globalvars.globalRunMode = runmode
-    globalvars.globalGenerationCounter.reset()
-    to_include = {'owner', 'NSApp', 'const', 'defaults', 'View', 'Box', 'Size', 'Rect',
-        'ControlSize', 'Menu', 'MainMenu', 'Action', 'Window', 'Panel', 'PanelStyle', 'Button',
-        'Checkbox', 'Label', 'TextField', 'TextView', 'SearchField', 'Popup', 'Combobox',
-        'RadioButtons', 'ProgressIndicator', 'ImageView', 'TabView', 'TableView', 'ListView',
-        'OutlineView', 'SplitView', 'Font', 'FontFamily', 'FontSize', 'FontTrait', 'Color', 'Pack',
-        'TextAlignment', 'HLayout', 'VLayout', 'VHLayout', 'SegmentedControl', 'Slider',
-        'NumberFormatter', 'NumberStyle', 'NLSTR',
-    }
-    module_globals = {name: globals()[name] for name in to_include}
-    module_globals['args'] = args
-    module_locals = {}
-    sys.path.insert(0, op.dirname(modulePath))
-    execfile(modulePath, module_globals, module_locals)
-    del sys.path[0]
+    globalvars.globalTableDriven = tableDriven
+    globalvars.globalElideDefaults = elideDefaults
+    globalvars.globalARC = arc
+    globalvars.globalPoolConstants = poolConstants
+    globalvars.globalCacheStrings = cacheStrings
+    constantPool = globalvars.globalConstantPool
+    constantPool.reset()
+    globalvars.globalLocalizedStrings = OrderedDict()
+    if report:
+        from .report import CodeReport
+        globalvars.globalCodeReport = CodeReport()
+    else:
+        globalvars.globalCodeReport = None
     assert 'result' in module_locals
-    tmpl = CodeTemplate(UNIT_TMPL)
+    tmpl = CodeTemplate(UNIT_IMPORTS_TMPL)
     if runmode:
-        owner._clear()
         owner._name = 'nil'
         ownerclass = 'id'
         ownerimport = None
@@ -103,6 +219,7 @@ def generate(modulePath, dest, runmode=False, localizationTable=None, args=None)
             if hasattr(value, 'OBJC_CLASS') and hasattr(value.__class__, 'OBJC_CLASS'):
                 value.OBJC_CLASS = value.__class__.OBJC_CLASS
     else:
+        owner._name = 'owner'
         ownerclass = module_locals.get('ownerclass', 'id')
         ownerimport = module_locals.get('ownerimport')
     if ownerimport:
@@ -113,45 +230,230 @@ def generate(modulePath, dest, runmode=False, localizationTable=None, args=None)
         ownerdecl = "id owner"
     else:
         ownerdecl = "%s *owner" % ownerclass
-    if dest_header:
-        tmpl.mainimport = "#import \"{}.h\"".format(dest_basename)
+    if header:
+        tmpl.mainimport = "#import \"{}.h\"".format(name)
     else:
         tmpl.mainimport = "#import \"XiblessSupport.h\""
         tmpl.ownerimport = ownerimport
-    for key, value in module_locals.items():
-        if isinstance(value, GeneratedItem) and value.varname.startswith('_tmp'):
-            value.varname = key
+    globalvars.globalSplitUnits = bool(splitSize)
+    globalvars.globalBatchedBindings = [] if batchBindings else None
+    globalvars.globalBatchedAccessibility = [] if batchAccessibility else None
+    globalvars.globalStaticKeyViewLoop = staticKeyViewLoop
+    globalvars.globalCacheScreenGeometry = cacheScreenGeometry
+    if splitSize:
+        # We need the pieces of code of each item to split them. See split.py.
+        pieces = []
+    else:
+        # The body is formatted as it's generated, one piece of code per item.
+        body = CodeFormatter(indentLevel=1, continued=True) if tidy else RawCode()
     toGenerate = globalvars.globalGenerationCounter.createdItems
-    codePieces = []
-    for item in toGenerate:
+    for item in scheduleGeneration(toGenerate):
+        # Items can be generated by their parent before we get to them in the schedule.
         if item.generated:
             continue
-        code = item.generate()
+        code = item._generate()
         if code:
-            codePieces.append(code)
-    for item in toGenerate:
-        code = item.generateFinalize()
+            if splitSize:
+                pieces.append(code)
+            else:
+                body.feed(code)
+                body.feed('\n')
+    splittableCount = len(pieces) if splitSize else 0
+    # Batched accessibility descriptions and bindings are applied once all items exist.
+    batches = []
+    if globalvars.globalBatchedAccessibility:
+        batches.append(generateAccessibilityBatch(globalvars.globalBatchedAccessibility))
+    if globalvars.globalBatchedBindings:
+        batches.append(generateBindingBatch(globalvars.globalBatchedBindings))
+    for code in batches:
+        if splitSize:
+            pieces.append(code)
+        else:
+            body.feed(code)
+            body.feed('\n')
+    globalvars.globalBatchedAccessibility = None
+    globalvars.globalBatchedBindings = None
+    counter = globalvars.globalGenerationCounter
+    finalizers = [item.generateFinalize for item in toGenerate if not counter.isFinalized(item)]
+    finalizers += [item.generateCompletion for item in toGenerate]
+    for finalizer in finalizers:
+        code = finalizer()
         if code:
-            codePieces.append(code)    
+            if splitSize:
+                pieces.append(code)
+            else:
+                body.feed(code)
+                body.feed('\n')
+            if report:
+                globalvars.globalCodeReport.addCode(finalizer.__self__, code)
     result = module_locals['result']
-    funcsig = "{}* create{}({})".format(result.OBJC_CLASS, dest_basename, ownerdecl)
-    tmpl.funcsig = funcsig
-    tmpl.contents = '\n'.join(codePieces)
+    funcsig = "{}* create{}({})".format(result.OBJC_CLASS, name, ownerdecl)
+    head = CodeTemplate(UNIT_HEAD_TMPL)
+    head.funcsig = funcsig
+    imports = tmpl.render()
+    helpers = ''
+    parts = []
+    if splitSize:
+        from . import split
+        # Constant markers have to be resolved before we look at the variables that pieces use.
+        # Finalize code stays at the end, we don't cut it.
+        finalizeCode = '\n'.join(pieces[splittableCount:])
+        declarations, contents = constantPool.resolve(
+            split.PIECE_SEPARATOR.join(pieces[:splittableCount]) + '\x00finalize\x00' + finalizeCode)
+        contents, finalizeCode = contents.split('\x00finalize\x00')
+        pieces = [split.CodePiece(code) for code in split.cutPieces(contents)]
+        splittableCount = len(pieces)
+        if finalizeCode:
+            pieces.append(split.CodePiece(finalizeCode))
+        visible = split.CodePiece(declarations).declared
+        visible['owner'] = ownerdecl[:-len('owner')].strip()
+        if cacheStrings:
+            visible['_localizedStrings'] = 'NSString * __strong *'
+        splitter = split.UnitSplitter(name, splitSize)
+        bodyCodes, functions = splitter.split(pieces, visible, splittableCount, extraUsed={'result'})
+        if splitFiles:
+            # Callees of a top level helper are in the same unit as it, as static functions.
+            for function in functions:
+                code = imports + ''.join(f.definition(static=True) + '\n' for f in function.allFunctions()[:-1])
+                code += function.definition(static=False)
+                parts.append((function.name[len('_create'):], tidyCode(code) if tidy else code))
+                helpers += function.signature(static=False) + ';\n'
+            if helpers:
+                helpers += '\n'
+        else:
+            for function in functions:
+                helpers += ''.join(f.definition(static=True) + '\n' for f in function.allFunctions())
+        contents = ''.join(code + '\n' for code in bodyCodes) + UNIT_FOOT
+    else:
+        body.feed(UNIT_FOOT)
+        # Constants are declared at the top of the function, but we only know them once the whole
+        # body has been generated. Their markers are only replaced now, in the formatted body.
+        declarations, contents = constantPool.resolve(body.close())
+    if cacheStrings and globalvars.globalLocalizedStrings:
+        declarations = localizedStringsLookup(globalvars.globalLocalizedStrings, localizationTable) + declarations
+    if tidy:
+        formatter = CodeFormatter()
+        formatter.feed(imports)
+        formatter.feed(helpers)
+        formatter.feed(head.render())
+        formatter.feed(declarations)
+        if splitSize:
+            formatter.feed(contents)
+            unit = formatter.close()
+        else:
+            unit = '\n'.join(formatter.lines) + '\n' + contents
+    else:
+        unit = imports + helpers + head.render() + declarations + contents
+    if header:
+        tmpl = CodeTemplate(HEADER_TMPL)
+        tmpl.funcsig = funcsig
+        tmpl.ownerimport = ownerimport
+        headerCode = tidyCode(tmpl.render())
+    else:
+        headerCode = None
+    if report:
+        costs = globalvars.globalCodeReport.costs()
+        globalvars.globalCodeReport = None
+    else:
+        costs = None
+    strings = sorted(globalvars.globalLocalizedStrings)
+    return GenerationResult(unit, headerCode, funcsig, result, list(toGenerate), costs, strings, parts)
+
+def generateCode(modulePath, name, header=True, runmode=False, localizationTable=None, args=None,
+        tableDriven=False, elideDefaults=False, arc=False, poolConstants=False, report=False,
+        cacheStrings=False, tidy=True, splitSize=None, splitFiles=False, batchBindings=False,
+        batchAccessibility=False, staticKeyViewLoop=False,
+        cacheScreenGeometry=False):
+    """Generates the code for the UI script at ``modulePath`` in memory.
+
+    ``name`` is the name of the unit (the function building the UI is ``create<name>``). If
+    ``header`` is true, the unit imports a ``<name>.h`` header which is also generated. Nothing is
+    written on disk. If ``report`` is true, the ``costs`` of the result attribute the generated
+    code to the items that generated it. If ``tidy`` is false, the code isn't indented, which is a
+    bit faster when it's only going to be compiled. If ``splitSize`` is set, self-contained parts of
+    the UI of at least that many items are created in helper functions, which are put in separate
+    units (the ``parts`` of the result) if ``splitFiles`` is true. If ``batchBindings`` is true,
+    bindings are applied all at once, at the end, from a static table. If ``batchAccessibility`` is
+    true, the accessibility descriptions of views are all set at once, at the end. If
+    ``staticKeyViewLoop`` is true, the key view loop of windows is computed from the layout rather
+    than by ``recalculateKeyViewLoop``. If ``cacheScreenGeometry`` is true, windows are positioned
+    with a cached main screen geometry. Returns a ``GenerationResult``.
+    """
+    if args is None:
+        args = {}
+    module_locals = runScript(modulePath, args)
+    return _generateCode(module_locals, name, header=header, runmode=runmode,
+        localizationTable=localizationTable, tableDriven=tableDriven, elideDefaults=elideDefaults,
+        arc=arc, poolConstants=poolConstants, report=report, cacheStrings=cacheStrings,
+        tidy=tidy, splitSize=splitSize, splitFiles=splitFiles, batchBindings=batchBindings,
+        batchAccessibility=batchAccessibility, staticKeyViewLoop=staticKeyViewLoop,
+        cacheScreenGeometry=cacheScreenGeometry)
+
+def generateVariants(modulePath, name, variants, header=True, args=None):
+    """Generates several variants of the code for the UI script at ``modulePath`` in memory.
+
+    ``variants`` is a list of dicts of ``generateCode()`` options (``runmode``,
+    ``localizationTable``, ``tableDriven``, ``elideDefaults``, ``arc``, ``poolConstants``,
+    ``report``, ``cacheStrings``, ``tidy``, ``splitSize``, ``splitFiles``, ``batchBindings``,
+    ``batchAccessibility``, ``staticKeyViewLoop``, ``cacheScreenGeometry``). The script is only
+    executed (and its layout computed) once. Returns a list of ``GenerationResult``, one per variant.
+    """
+    if args is None:
+        args = {}
+    module_locals = runScript(modulePath, args)
+    state = _GraphState(globalvars.globalGenerationCounter)
+    result = []
+    for variant in variants:
+        state.restore()
+        result.append(_generateCode(module_locals, name, header=header, **variant))
+    return result
+
+def generate(modulePath, dest, runmode=False, localizationTable=None, args=None, tableDriven=False,
+        elideDefaults=False, arc=False, poolConstants=False, report=None, stringsFolder=None,
+        cacheStrings=False, tidy=True, splitSize=None, splitFiles=False, batchBindings=False,
+        batchAccessibility=False, staticKeyViewLoop=False,
+        cacheScreenGeometry=False):
+    # If `report` is set, it's the path of a report file to which the code costs of this script
+    # are appended (see report.py). If `stringsFolder` is set along with `localizationTable`, the
+    # localized strings are merged in the "<localizationTable>.strings" file of that folder.
+    dest_basename, dest_ext = op.splitext(op.basename(dest))
+    if dest_ext == '.h':
+        dest_header = None
+    else:
+        if not dest_ext:
+            dest += '.m'
+        dest_header = op.splitext(dest)[0] + '.h'
+    generated = generateCode(modulePath, dest_basename, header=dest_header is not None,
+        runmode=runmode, localizationTable=localizationTable, args=args, tableDriven=tableDriven,
+        elideDefaults=elideDefaults, arc=arc, poolConstants=poolConstants, report=bool(report),
+        cacheStrings=cacheStrings, tidy=tidy, splitSize=splitSize, splitFiles=splitFiles,
+        batchBindings=batchBindings, batchAccessibility=batchAccessibility,
+        staticKeyViewLoop=staticKeyViewLoop, cacheScreenGeometry=cacheScreenGeometry)
     from xibless import __version__ # We have to import it here to avoid circular references
     autogen_comment = AUTOGEN_COMMENT.format(version=__version__, timestamp=datetime.now().strftime('%c'))
     with open(dest, 'wb') as fp:
         fp.write(autogen_comment.encode('utf-8'))
-        fp.write(tidyCode(tmpl.render()).encode('utf-8'))
+        fp.write(generated.unit.encode('utf-8'))
     if dest_header:
-        tmpl = CodeTemplate(HEADER_TMPL)
-        tmpl.funcsig = funcsig
-        tmpl.ownerimport = ownerimport
         with open(dest_header, 'wt') as fp:
             fp.write(autogen_comment)
-            fp.write(tidyCode(tmpl.render()))
+            fp.write(generated.header)
+    for partName, code in generated.parts:
+        with open(op.join(op.dirname(dest), partName + '.m'), 'wb') as fp:
+            fp.write(autogen_comment.encode('utf-8'))
+            fp.write(code.encode('utf-8'))
     copy_support_unit(op.dirname(dest))
+    if report:
+        from .report import reportRecord, appendReport
+        appendReport(report, reportRecord(modulePath, generated.unit, generated.costs))
+    if stringsFolder and localizationTable:
+        from .strings import mergeStrings
+        mergeStrings(op.join(stringsFolder, localizationTable + '.strings'), generated.strings)
 
 def runUI(modulePath):
+    # Only needed here, and slow to import.
+    import tempfile
+    from subprocess import Popen
     runtemplatePath = op.join(op.dirname(op.abspath(__file__)), 'runtemplate')
     assert op.exists(runtemplatePath)
     tmpPath = tempfile.mkdtemp()
@@ -167,19 +469,96 @@ def runUI(modulePath):
     p = Popen(cmd, shell=True)
     p.wait()
 
-def tidyCode(code):
-    lines = (l.strip() for l in code.split('\n'))
-    result = []
-    level = 0
-    for line in lines:
+# Tokens that matter when looking for the braces of a line: string and char literals (which can
+# contain braces), comments and braces. Unterminated literals end with the line.
+RE_CODE_TOKEN = re.compile(r'''"(?:[^"\\]|\\.)*"?|'(?:[^'\\]|\\.)*'?|//|/\*|[{}]''')
+
+class CodeFormatter(object):
+    # Strips the lines of Objective-C code that is fed to it, indents them after their braces and
+    # collapses blank lines. Code can be fed in pieces, split anywhere: the result is the same as if
+    # it had been fed at once. Braces in literals and comments are ignored. `continued` means that
+    # the code follows a non-blank line that was formatted elsewhere.
+    def __init__(self, indentLevel=0, continued=False):
+        self.indentLevel = indentLevel
+        self.lines = []
+        self._pending = ''
+        self._inComment = False
+        self._lastLineBlank = not continued
+
+    def _countBraces(self, line):
+        # Returns (opened, closed, leading), `leading` being the number of braces closed before
+        # the first one that is opened, by which the line itself is dedented.
+        opened = closed = leading = 0
+        pos = 0
+        while True:
+            if self._inComment:
+                end = line.find('*/', pos)
+                if end < 0:
+                    break
+                self._inComment = False
+                pos = end + 2
+            match = RE_CODE_TOKEN.search(line, pos)
+            if match is None:
+                break
+            token = match.group()
+            if token == '{':
+                opened += 1
+            elif token == '}':
+                closed += 1
+                if not opened:
+                    leading += 1
+            elif token == '//':
+                break
+            elif token == '/*':
+                self._inComment = True
+            pos = match.end()
+        return opened, closed, leading
+
+    def _addLine(self, line):
+        line = line.strip()
         if not line:
-            if result and result[-1] != '':
-                result.append('')
-            continue
-        level -= line.count('}')
-        result.append((' ' * (level * 4)) + line)
-        level += line.count('{')
-    return '\n'.join(result)
+            if not self._lastLineBlank:
+                self.lines.append('')
+                self._lastLineBlank = True
+            return
+        self._lastLineBlank = False
+        if self._inComment or '{' in line or '}' in line or '/*' in line:
+            opened, closed, leading = self._countBraces(line)
+        else:
+            opened = closed = leading = 0
+        self.indentLevel -= leading
+        self.lines.append((' ' * (self.indentLevel * 4)) + line)
+        self.indentLevel += opened - (closed - leading)
+
+    def feed(self, code):
+        lines = (self._pending + code).split('\n')
+        self._pending = lines.pop()
+        for line in lines:
+            self._addLine(line)
+
+    def close(self):
+        # Returns the formatted code. A trailing newline gives a trailing newline.
+        self._addLine(self._pending)
+        self._pending = ''
+        return '\n'.join(self.lines)
+
+
+class RawCode(object):
+    # A CodeFormatter that doesn't format, for code that will only be compiled.
+    def __init__(self):
+        self._pieces = []
+
+    def feed(self, code):
+        self._pieces.append(code)
+
+    def close(self):
+        return ''.join(self._pieces)
+
+
+def tidyCode(code):
+    formatter = CodeFormatter()
+    formatter.feed(code)
+    return formatter.close()
 
 def copy_support_unit(destfolder):
     DATA_PATH = op.join(op.dirname(__file__), 'data')
@@ -1,3 +1,38 @@
 globalLocalizationTable = None
+# The strings (in their escaped form) that were localized during the current generation, mapped to
+# their index in the order they were first used. See strings.py.
+globalLocalizedStrings = {}
+# When True, localized strings are looked up once, on the first call of the generated function, in
+# a static table rather than with NSLocalizedStringFromTable() every time they're used.
+globalCacheStrings = False
 globalRunMode = False
+# When True, homogeneous child lists (segments, table columns, menu items) are emitted as C arrays
+# iterated by a loop rather than being unrolled.
+globalTableDriven = False
+# When True, property setters for values that are equal to AppKit's defaults aren't generated.
+globalElideDefaults = False
+# When True, the generated code is meant to be compiled with ARC: new instances aren't autoreleased,
+# the local variable holding them keeps them alive until their parent retains them.
+globalARC = False
+# When True, constant objects (images, localized strings, arrays, dictionaries) that are used more
+# than once in a unit are only created once. See types.ConstantPool.
+globalPoolConstants = False
+globalConstantPool = None
+# When set to a list, bindings aren't generated by their item but are added to that list as
+# (object, name, target, keyPath, options) code tuples, to be applied in batch. See
+# base.generateBindingBatch().
+globalBatchedBindings = None
+# When True, windows' key view loop is computed at generation time rather than by
+# recalculateKeyViewLoop. See View.keyViews().
+globalStaticKeyViewLoop = False
+# When True, windows are positioned with mainScreenVisibleFrame() from XiblessSupport, which
+# caches the main screen's visible frame.
+globalCacheScreenGeometry = False
+# When set to a list, views' accessibility descriptions are added to it as (object, description)
+# code tuples instead of being set by their view. See base.generateAccessibilityBatch().
+globalBatchedAccessibility = None
+# When True, the generated code is going to be split in helper functions. See split.py.
+globalSplitUnits = False
+# When set to a report.CodeReport, generated code is attributed to the items that generated it.
+globalCodeReport = None
 globalGenerationCounter = None
\ No newline at end of file
@@ -11,3 +11,6 @@ class ImageView(View):
         self.name = name
         self.alignment = alignment
     
+    def canBecomeKeyView(self):
+        return False
+    
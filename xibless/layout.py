@@ -50,8 +50,12 @@ class Layout(View):
     def outerMargin(self, other, side):
         return max(view.outerMargin(other, side) for view in self.subviews)
     
+    # Our subviews are also subviews of our parent, which puts them in the key view loop.
+    def keyViews(self):
+        return []
+    
     # We don't want to be generating any objc code for the layout.
-    def generate(self, *args, **kwargs):
+    def _generate(self, *args, **kwargs):
         return ''
 
 def splitByElement(views, element):
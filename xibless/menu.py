@@ -1,6 +1,8 @@
-from .base import GeneratedItem, NSApp, const, convertValueToObjc
+from .base import (GeneratedItem, NSApp, const, convertValueToObjc, generateArrayLoop,
+    generateAllocInit, TABLE_DRIVEN_MIN_ITEMS)
 from .types import Action
 from .property import ImageProperty, ActionProperty, KeyShortcutProperty
+from . import globalvars
 
 class MenuItem(GeneratedItem):
     OBJC_CLASS = 'NSMenuItem'
@@ -8,6 +10,11 @@ class MenuItem(GeneratedItem):
         'tag', 'hidden', ImageProperty('image'), ActionProperty('action'),
         KeyShortcutProperty('shortcut'), 'state'
     ]
+    COCOA_DEFAULTS = dict(GeneratedItem.COCOA_DEFAULTS, hidden=False, tag=0,
+        state=const.NSOffState)
+    # Properties that Menu can set from within a table-driven loop. Items with any other property
+    # set have to be generated individually.
+    TABLE_DRIVEN_PROPERTIES = {'target', 'action', 'keyEquivalent', 'keyEquivalentModifierMask', 'tag'}
     
     def __init__(self, name, action=None, shortcut=None, tag=None):
         GeneratedItem.__init__(self)
@@ -16,6 +23,16 @@ class MenuItem(GeneratedItem):
         self.shortcut = shortcut
         self.tag = tag
     
+    def canBeTableDriven(self):
+        if not GeneratedItem.canBeTableDriven(self):
+            return False
+        self._collectProperties()
+        target = self.properties.get('target')
+        if isinstance(target, GeneratedItem) and not target.generated:
+            return False
+        return all(value is None for key, value in self.properties.items()
+            if key not in self.TABLE_DRIVEN_PROPERTIES)
+    
     def generateInit(self, menuname):
         tmpl = GeneratedItem.generateInit(self)
         if self.name == "-":
@@ -56,28 +73,97 @@ class Menu(GeneratedItem):
     def removeItem(self, index):
         del self.items[index]
     
+    def _generateItemsLoop(self, items):
+        def column(key, default):
+            values = [item.properties.get(key) for item in items]
+            return [(default if v is None else convertValueToObjc(v)) for v in values]
+        
+        def isUsed(key):
+            return any(item.properties.get(key) is not None for item in items)
+        
+        titles = [('nil' if item.name == '-' else convertValueToObjc(item.name)) for item in items]
+        arrays = [
+            ('NSString *', '_titles', titles),
+            ('SEL', '_actions', column('action', 'NULL')),
+        ]
+        body = ''
+        if '-' in (item.name for item in items):
+            body += "if (_titles[_i] == nil) {\n[$varname$ addItem:[NSMenuItem separatorItem]];\ncontinue;\n}\n"
+        itemsetup = ''
+        if isUsed('target'):
+            arrays.append(('id', '_targets', column('target', 'nil')))
+            itemsetup += "[_item setTarget:_targets[_i]];\n"
+        if isUsed('keyEquivalent'):
+            arrays.append(('NSString *', '_keyEquivalents', column('keyEquivalent', 'nil')))
+            arrays.append(('NSUInteger', '_modifierMasks', column('keyEquivalentModifierMask', '0')))
+            itemsetup += "if (_keyEquivalents[_i] != nil) {\n[_item setKeyEquivalent:_keyEquivalents[_i]];\n[_item setKeyEquivalentModifierMask:_modifierMasks[_i]];\n}\n"
+        if isUsed('tag'):
+            arrays.append(('NSInteger', '_tags', column('tag', '0')))
+            itemsetup += "[_item setTag:_tags[_i]];\n"
+        additem = "[$varname$ addItemWithTitle:_titles[_i] action:_actions[_i] keyEquivalent:@\"\"];\n"
+        if itemsetup:
+            body += "NSMenuItem *_item = " + additem + itemsetup
+        else:
+            body += additem
+        for item in items:
+            globalvars.globalGenerationCounter.addGenerated(item)
+        result = generateArrayLoop(arrays, body)
+        report = globalvars.globalCodeReport
+        if report is not None:
+            report.addChildrenCode(items, result.replace('$varname$', self.varname))
+        return result
+    
+    def _generateItems(self):
+        result = []
+        tableDrivenItems = []
+        
+        def flushTableDrivenItems():
+            if len(tableDrivenItems) >= TABLE_DRIVEN_MIN_ITEMS:
+                result.append(self._generateItemsLoop(tableDrivenItems))
+            else:
+                for item in tableDrivenItems:
+                    result.append(self._generateItem(item))
+            del tableDrivenItems[:]
+        
+        for item in self.items:
+            assert isinstance(item, (Menu, MenuItem))
+            if globalvars.globalTableDriven and isinstance(item, MenuItem) and item.canBeTableDriven():
+                tableDrivenItems.append(item)
+            else:
+                flushTableDrivenItems()
+                result.append(self._generateItem(item))
+        flushTableDrivenItems()
+        return result
+    
+    def _generateItem(self, item):
+        item.varname = self.varname + '_sub'
+        # The item is declared in a block, out of the scope of the code applying batched bindings at
+        # the end of the unit, so its bindings are applied right away.
+        batchedBindings = globalvars.globalBatchedBindings
+        globalvars.globalBatchedBindings = None
+        try:
+            code = item.generate(self.varname)
+        finally:
+            globalvars.globalBatchedBindings = batchedBindings
+        # We wrap it in a block to avoid naming clashes.
+        return '{' + code + '}'
+    
     def generateInit(self, menuname=None):
         tmpl = GeneratedItem.generateInit(self)
+        allocinit = generateAllocInit('NSMenu', 'initWithTitle:$name$')
         if menuname:
             tmpl.allocinit = """
                 NSMenuItem *_tmpitem = [$menuname$ addItemWithTitle:$name$ action:nil keyEquivalent:@""];
-                NSMenu *$varname$ = [[[NSMenu alloc] initWithTitle:$name$] autorelease];
+                NSMenu *$varname$ = %s;
                 [$menuname$ setSubmenu:$varname$ forItem:_tmpitem];
-            """
+            """ % allocinit
         else:
             tmpl.allocinit = """
-                NSMenu *$varname$ = [[[NSMenu alloc] initWithTitle:$name$] autorelease];
-            """
+                NSMenu *$varname$ = %s;
+            """ % allocinit
         tmpl.name = convertValueToObjc(self.name)
         tmpl.menuname = menuname
-        subitemscode = []
-        for item in self.items:
-            assert isinstance(item, (Menu, MenuItem))
-            item.varname = self.varname + '_sub'
-            code = item.generate(self.varname)
-            # We wrap it in a block to avoid naming clashes.
-            subitemscode.append('{' + code + '}')
-        tmpl.setup = '\n'.join(subitemscode)
+        tmpl.setup = '\n'.join(self._generateItems())
         return tmpl
     
 
@@ -0,0 +1,49 @@
+from __future__ import division
+
+import math
+
+from .font import FontSize, FontTrait
+
+# Approximate text measurement, so that views can be sized after their text at generation time.
+# We don't have access to the real fonts (we don't even need to run on a Mac), so we use the
+# advance widths of Helvetica (from its AFM file, in 1/1000 of em), which are close enough to the
+# system fonts' for sizing purposes. Characters that aren't in the table get the average width.
+
+HELVETICA_WIDTHS = dict(zip(
+    ' !"#$%&\'()*+,-./0123456789:;<=>?@ABCDEFGHIJKLMNOPQRSTUVWXYZ[\\]^_`abcdefghijklmnopqrstuvwxyz{|}~',
+    [
+        278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278, # space to /
+        556, 556, 556, 556, 556, 556, 556, 556, 556, 556, # 0 to 9
+        278, 278, 584, 584, 584, 556, 1015, # : to @
+        667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, # A to M
+        722, 778, 667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, # N to Z
+        278, 278, 278, 469, 556, 333, # [ to `
+        556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, # a to m
+        556, 556, 556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, # n to z
+        334, 260, 334, 584, # { to ~
+    ]
+))
+AVERAGE_WIDTH = 556
+# Bold glyphs are wider. This is roughly the ratio between Helvetica-Bold and Helvetica.
+BOLD_RATIO = 1.08
+
+# Point sizes of the symbolic font sizes.
+FONTSIZE2POINTS = {
+    FontSize.System: 13,
+    FontSize.SmallSystem: 11,
+    FontSize.Label: 10,
+    FontSize.RegularControl: 13,
+    FontSize.SmallControl: 11,
+    FontSize.MiniControl: 9,
+}
+
+def fontPointSize(font):
+    return FONTSIZE2POINTS.get(font.size, font.size)
+
+def textWidth(text, font):
+    """Returns the approximate width, in points, of ``text`` (a single line) drawn with ``font``."""
+    units = sum(HELVETICA_WIDTHS.get(c, AVERAGE_WIDTH) for c in text)
+    result = units * fontPointSize(font) / 1000
+    if FontTrait.Bold in font.traits:
+        result *= BOLD_RATIO
+    return int(math.ceil(result))
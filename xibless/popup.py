@@ -1,11 +1,16 @@
 from .base import convertValueToObjc, const
 from .property import Property
+from .control import TextPaddings
 from .button import Button
 from .menu import Menu
 
 class Popup(Button):
     OBJC_CLASS = 'NSPopUpButton'
     PROPERTIES = Button.PROPERTIES + [Property('arrowPosition', 'cell.arrowPosition')]
+    # NSPopUpButtonCell doesn't document its default bezel style.
+    COCOA_DEFAULTS = {k: v for k, v in Button.COCOA_DEFAULTS.items() if k != 'bezelStyle'}
+    # The padding includes the arrows.
+    TEXT_PADDINGS = TextPaddings(40, 35, 30)
     
     def __init__(self, parent, items=None):
         Button.__init__(self, parent, '')
@@ -43,6 +48,11 @@ class Popup(Button):
                 self.layoutDeltaY = 0
                 self.layoutDeltaH = 0
     
+    def _textsToFit(self):
+        # A popup is as wide as its widest item. A pull-down only shows its first item.
+        names = [item.name for item in self.menu.items if getattr(item, 'name', '-') != '-']
+        return names[:1] if self.pullsdown else names
+    
     def dependencies(self):
         return Button.dependencies(self) + [self.menu]
     
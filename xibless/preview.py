@@ -0,0 +1,198 @@
+from __future__ import division
+
+import os.path as op
+from xml.sax.saxutils import escape
+
+from .gen import runScript
+from .view import View, Pack
+from .layout import Layout
+from .tabview import TabView
+
+try:
+    basestring
+except NameError: # python 3
+    basestring = str
+
+# Renders the layout of a UI script as a SVG image without having to compile and run it. It's only
+# an approximation of the real thing: every view is drawn as a labeled box at its frame rect,
+# styled after its class, with an indicator of its anchor.
+
+PANEL_MARGIN = 20
+PANEL_TITLE_HEIGHT = 16
+MAX_TEXT_LENGTH = 30
+
+# The style of a view is the one of the first class in its MRO that has one.
+STYLED_CLASSES = {
+    'Window', 'Box', 'TabView', 'TabSubView', 'SplitView', 'Button', 'Checkbox', 'Popup',
+    'TextField', 'Label', 'SearchField', 'Combobox', 'TextView', 'TableView', 'RadioButtons',
+    'SegmentedControl', 'Slider', 'ProgressIndicator', 'ImageView', 'View',
+}
+
+SVG_STYLE = """
+rect { stroke: #666; stroke-width: 1; fill: none; }
+text { font: 9px sans-serif; fill: #222; }
+text.title { font: bold 11px sans-serif; }
+.Window { fill: #ececec; stroke: #333; }
+.View, .TabSubView { stroke: #aaa; stroke-dasharray: 3,2; }
+.Box, .TabView { fill: #e2e2e2; stroke: #888; }
+.SplitView { fill: #dadada; }
+.Button, .SegmentedControl { fill: #dce7f7; stroke: #4a78b5; }
+.Checkbox, .RadioButtons { fill: #f3f3f3; stroke: #4a78b5; stroke-dasharray: 2,1; }
+.Popup, .Combobox { fill: #e8e1f6; stroke: #6a52a8; }
+.TextField, .SearchField, .TextView, .TableView { fill: #ffffff; stroke: #777; }
+.Label { stroke: #bbb; stroke-dasharray: 1,2; }
+.Slider, .ProgressIndicator { fill: #e4f2e1; stroke: #4f8f45; }
+.ImageView { fill: #f6efdc; stroke: #a88a3a; }
+.anchor { fill: #d33; stroke: none; }
+.grow { stroke: #d33; stroke-width: 1; marker-start: url(#arrow); marker-end: url(#arrow); }
+"""
+
+SVG_DEFS = """
+<defs>
+<marker id="arrow" viewBox="0 0 6 6" refX="3" refY="3" markerWidth="6" markerHeight="6" orient="auto-start-reverse">
+<path d="M0,0 L6,3 L0,6 z" fill="#d33"/>
+</marker>
+</defs>
+"""
+
+def styleClass(view):
+    for cls in type(view).__mro__:
+        if cls.__name__ in STYLED_CLASSES:
+            return cls.__name__
+    return 'View'
+
+def viewName(view):
+    # Unnamed items have a "_tmp" varname which isn't very useful to show.
+    if view._varname and not view._varname.startswith('_tmp'):
+        return view._varname
+    return ''
+
+def tabContentOrigin(tabview, x, y, width):
+    # NSTabView places the view of its tab items in a content rect that is inset from its frame.
+    # We center it horizontally and use the same inset at the bottom, tabs take what's left above.
+    inset = (width - tabview.tabs[0].view.width) / 2
+    return x + inset, y + inset
+
+def walkLayout(root, allTabs=False):
+    # Yields (view, parent, (x, y, width, height)) for root and all views under it, parents first.
+    # Coordinates are absolute frame coordinates (in Cocoa's orientation) in root's coordinate
+    # system, root being at (0, 0). Layouts aren't real views, so they're skipped (their subviews
+    # are also subviews of the layout's parent). Unless `allTabs` is set, only the first tab of a
+    # TabView is walked; the other ones can be walked separately with their `view` as a root.
+    stack = [(root, None, 0, 0)]
+    while stack:
+        view, parent, originX, originY = stack.pop()
+        x, y, w, h = view.frameRect()
+        if parent is None:
+            x, y = 0, 0
+        x += originX
+        y += originY
+        yield view, parent, (x, y, w, h)
+        children = []
+        for subview in view.subviews:
+            if not isinstance(subview, Layout):
+                children.append((subview, view, x, y))
+        if isinstance(view, TabView) and view.tabs:
+            contentX, contentY = tabContentOrigin(view, x, y, w)
+            tabs = view.tabs if allTabs else view.tabs[:1]
+            children += [(tab.view, view, contentX, contentY) for tab in tabs]
+        stack.extend(reversed(children))
+
+def _anchorPoint(corner, x, y, w, h):
+    # `y` is the top of the rect in SVG coordinates.
+    if corner in {Pack.UpperLeft, Pack.LowerLeft, Pack.Left}:
+        px = x
+    elif corner in {Pack.UpperRight, Pack.LowerRight, Pack.Right}:
+        px = x + w
+    else:
+        px = x + w / 2
+    if corner in {Pack.UpperLeft, Pack.UpperRight, Pack.Above}:
+        py = y
+    elif corner in {Pack.LowerLeft, Pack.LowerRight, Pack.Below}:
+        py = y + h
+    else:
+        py = y + h / 2
+    return px, py
+
+def _renderView(view, parent, rect, panelX, panelY, panelHeight):
+    x, y, w, h = rect
+    # SVG's y axis goes down, Cocoa's goes up.
+    x = panelX + x
+    y = panelY + panelHeight - (y + h)
+    result = ['<rect class="{}" x="{:g}" y="{:g}" width="{:g}" height="{:g}"/>'.format(
+        styleClass(view), x, y, w, h)]
+    label = ' '.join(s for s in [viewName(view), '({})'.format(type(view).__name__)] if s)
+    text = getattr(view, 'title', None) or getattr(view, 'text', None)
+    if isinstance(text, basestring) and text:
+        text = ' '.join(text.split())
+        if len(text) > MAX_TEXT_LENGTH:
+            text = text[:MAX_TEXT_LENGTH - 3] + '...'
+        label += ' "{}"'.format(text)
+    result.append('<text x="{:g}" y="{:g}">{}</text>'.format(x + 2, y + 10, escape(label)))
+    if isinstance(view, TabView) and view.tabs:
+        tabLabels = ' | '.join(str(tab.label) for tab in view.tabs)
+        result.append('<text x="{:g}" y="{:g}">{}</text>'.format(x + 2, y + 22, escape(tabLabels)))
+    if parent is not None and isinstance(view.anchor, tuple):
+        corner, growX, growY = view.anchor
+        ax, ay = _anchorPoint(corner, x, y, w, h)
+        result.append('<circle class="anchor" cx="{:g}" cy="{:g}" r="2.5"/>'.format(ax, ay))
+        cx, cy = x + w / 2, y + h / 2
+        if growX:
+            result.append('<line class="grow" x1="{:g}" y1="{:g}" x2="{:g}" y2="{:g}"/>'.format(
+                x + 4, cy, x + w - 4, cy))
+        if growY:
+            result.append('<line class="grow" x1="{:g}" y1="{:g}" x2="{:g}" y2="{:g}"/>'.format(
+                cx, y + 4, cx, y + h - 4))
+    return result
+
+def _panels(result):
+    # Returns a list of (title, root) to render. The first one is the script's result, the other
+    # ones are the tabs that aren't shown in it.
+    panels = [(viewName(result) or 'result', result)]
+    for view, parent, rect in walkLayout(result):
+        if isinstance(view, TabView):
+            for tab in view.tabs[1:]:
+                title = '{} > {}'.format(viewName(view) or 'TabView', tab.label)
+                panels.append((title, tab.view))
+    # Tabs of tab views that are in other tabs aren't reachable from the result. We walk the
+    # panels we add as we go to find them.
+    index = 1
+    while index < len(panels):
+        for view, parent, rect in walkLayout(panels[index][1]):
+            if view is not panels[index][1] and isinstance(view, TabView):
+                for tab in view.tabs[1:]:
+                    title = '{} > {}'.format(viewName(view) or 'TabView', tab.label)
+                    panels.append((title, tab.view))
+        index += 1
+    return panels
+
+def renderSVG(result):
+    """Returns the SVG rendering of ``result`` (a View, usually a Window) as a string."""
+    panels = _panels(result)
+    width = max(root.frameRect()[2] for title, root in panels) + PANEL_MARGIN * 2
+    elements = []
+    panelY = PANEL_MARGIN
+    for title, root in panels:
+        panelHeight = root.frameRect()[3]
+        elements.append('<text class="title" x="{}" y="{}">{}</text>'.format(
+            PANEL_MARGIN, panelY + 11, escape(title)))
+        panelY += PANEL_TITLE_HEIGHT
+        for view, parent, rect in walkLayout(root):
+            elements += _renderView(view, parent, rect, PANEL_MARGIN, panelY, panelHeight)
+        panelY += panelHeight + PANEL_MARGIN
+    header = '<svg xmlns="http://www.w3.org/2000/svg" width="{:g}" height="{:g}">'.format(width, panelY)
+    style = '<style>{}</style>'.format(SVG_STYLE)
+    return '\n'.join([header, style, SVG_DEFS] + elements + ['</svg>']) + '\n'
+
+def preview(modulePath, dest, args=None):
+    """Executes the UI script at ``modulePath`` and writes a SVG preview of its layout at ``dest``."""
+    if op.splitext(dest)[1].lower() != '.svg':
+        raise ValueError("Previews can only be rendered as SVG (the destination must end with .svg)")
+    if args is None:
+        args = {}
+    module_locals = runScript(modulePath, args)
+    result = module_locals['result']
+    if not isinstance(result, View):
+        raise ValueError("Only windows and views can be previewed")
+    with open(dest, 'wb') as fp:
+        fp.write(renderSVG(result).encode('utf-8'))
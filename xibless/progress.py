@@ -8,6 +8,8 @@ class ProgressIndicator(View):
         'style', 'controlSize', 'minValue', 'maxValue', 'indeterminate', 'displayedWhenStopped',
         Property('value', 'doubleValue'),
     ]
+    COCOA_DEFAULTS = dict(View.COCOA_DEFAULTS, style=const.NSProgressIndicatorBarStyle,
+        minValue=0, maxValue=100, doubleValue=0, indeterminate=True, displayedWhenStopped=True)
     
     def __init__(self, parent):
         View.__init__(self, parent, 92, 16)
@@ -44,3 +46,6 @@ class ProgressIndicator(View):
             else:
                 self.width = self.height = 32
     
+    def canBecomeKeyView(self):
+        return False
+    
@@ -1,4 +1,21 @@
 from .types import Literal, KeyValueId, NLSTR, Flags
+from . import globalvars
+
+_MISSING = object()
+_KEY_CACHE = {}
+
+def splitPropertyKey(key):
+    # Splits a property key such as "cell.controlSize" into its accessor path, its name and the name
+    # of its setter: (('cell', ), 'controlSize', 'setControlSize'). The same keys come up for every
+    # item we generate, so we cache the result.
+    try:
+        return _KEY_CACHE[key]
+    except KeyError:
+        elements = key.split('.')
+        name = elements[-1]
+        result = (tuple(elements[:-1]), name, 'set' + name[0].upper() + name[1:])
+        _KEY_CACHE[key] = result
+        return result
 
 class Property(object):
     def __init__(self, name, targetName=None):
@@ -17,15 +34,17 @@ class Property(object):
         target.properties[self.targetName] = self._convertValue(value)
     
     def setOnTarget(self, target):
-        if hasattr(target, self.name):
-            self._setProperty(target, getattr(target, self.name))
+        value = getattr(target, self.name, _MISSING)
+        if value is not _MISSING:
+            self._setProperty(target, value)
         
     
 class ImageProperty(Property):
     def _convertValue(self, value):
         if not value:
             return None
-        return Literal(KeyValueId(None, 'NSImage')._callMethod('imageNamed', NLSTR(value), endline=False))
+        image = KeyValueId(None, 'NSImage')._callMethod('imageNamed', NLSTR(value), endline=False)
+        return Literal(globalvars.globalConstantPool.use('NSImage *', image))
     
 
 class ActionProperty(Property):
@@ -1,5 +1,6 @@
 from __future__ import division, print_function
 
+from .base import generateAllocInit
 from .types import stringArray
 from .control import Control, ControlHeights
 
@@ -30,7 +31,7 @@ class RadioButtons(Control):
         tmpl.allocinit = """
         NSMatrix *$varname$;
         {
-            NSButtonCell *_radioPrototype = [[[NSButtonCell alloc] init] autorelease];
+            NSButtonCell *_radioPrototype = $prototypeinit$;
             [_radioPrototype setButtonType:NSRadioButton];
             NSInteger _rows = $rows$;
             NSInteger _cols = $cols$;
@@ -45,6 +46,7 @@ class RadioButtons(Control):
             }
         }
         """
+        tmpl.prototypeinit = generateAllocInit('NSButtonCell', 'init')
         tmpl.cols = self.columns
         tmpl.rows = self._getRowCount()
         tmpl.radiostrings = stringArray(self.items)
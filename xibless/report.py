@@ -0,0 +1,125 @@
+from __future__ import print_function
+
+import re
+import json
+from collections import namedtuple
+
+# Attributes the generated code to the items that emitted it, to find out which UIs and which
+# widget types make the generated code (and thus the binary) big. Code is measured without its
+# indentation: `lines` are non-empty lines, `bytes` their stripped length (plus newline) and
+# `sends` the number of Objective-C message sends.
+
+ItemCost = namedtuple('ItemCost', 'varname classname lines bytes sends')
+
+# A "[" that isn't a subscript (which follows an identifier, "]" or ")") starts a message send.
+RE_MESSAGE_SEND = re.compile(r'(?<![\w\]\)])\[')
+
+def measureCode(code):
+    lines = 0
+    size = 0
+    for line in code.split('\n'):
+        line = line.strip()
+        if line:
+            lines += 1
+            size += len(line) + 1
+    return lines, size, len(RE_MESSAGE_SEND.findall(code))
+
+class CodeReport(object):
+    # Set as globalvars.globalCodeReport during generation. Items call enter() and leave() around
+    # the generation of their code. Because items can generate other items in their own code
+    # (table columns, menu items), we keep a stack to subtract nested code from the parent's.
+    def __init__(self):
+        self._stack = []
+        self._costs = {}
+        self._order = []
+
+    def _add(self, item, lines, size, sends):
+        if item not in self._costs:
+            self._costs[item] = [0, 0, 0]
+            self._order.append(item)
+        cost = self._costs[item]
+        cost[0] += lines
+        cost[1] += size
+        cost[2] += sends
+
+    def enter(self, item):
+        self._stack.append([0, 0, 0])
+
+    def leave(self, item, code):
+        nested = self._stack.pop()
+        lines, size, sends = measureCode(code)
+        if self._stack:
+            parentNested = self._stack[-1]
+            parentNested[0] += lines
+            parentNested[1] += size
+            parentNested[2] += sends
+        self._add(item, lines - nested[0], size - nested[1], sends - nested[2])
+
+    def addCode(self, item, code):
+        # For code generated outside of _generate(), such as generateFinalize().
+        self._add(item, *measureCode(code))
+
+    def addChildrenCode(self, items, code):
+        # For code that the item being generated emits on behalf of several children at once (the
+        # loop creating the columns of a table or the items of a menu in tableDriven mode). Its
+        # cost is split evenly across the children instead of being charged to the parent.
+        measures = measureCode(code)
+        if self._stack:
+            parentNested = self._stack[-1]
+            for index, measure in enumerate(measures):
+                parentNested[index] += measure
+        count = len(items)
+        for index, item in enumerate(items):
+            share = [total // count + (1 if index < total % count else 0) for total in measures]
+            self._add(item, *share)
+
+    def costs(self):
+        return [
+            ItemCost(item.varname, item.__class__.__name__, *self._costs[item])
+            for item in self._order
+        ]
+
+
+def reportRecord(script, unit, costs):
+    # The JSON-friendly record of a script's report. `total` is measured on the whole unit and
+    # includes the code that isn't attributed to any item.
+    lines, size, sends = measureCode(unit)
+    return {
+        'script': script,
+        'total': {'lines': lines, 'bytes': size, 'sends': sends},
+        'items': [cost._asdict() for cost in costs],
+    }
+
+def appendReport(path, record):
+    with open(path, 'at') as fp:
+        fp.write(json.dumps(record, sort_keys=True) + '\n')
+
+def readReports(path):
+    with open(path, 'rt') as fp:
+        for line in fp:
+            if line.strip():
+                yield json.loads(line)
+
+def printReportSummary(path, limit=20):
+    # Ranks the scripts of a report file by size and rolls up item costs per class. When a script
+    # was compiled more than once in the same report, only its last record counts.
+    records = {}
+    for record in readReports(path):
+        records[record['script']] = record
+    scripts = sorted(records.values(), key=lambda r: r['total']['bytes'], reverse=True)
+    print("{:>8} {:>7} {:>6}  Script".format('Bytes', 'Lines', 'Sends'))
+    for record in scripts[:limit]:
+        total = record['total']
+        print("{:>8} {:>7} {:>6}  {}".format(total['bytes'], total['lines'], total['sends'], record['script']))
+    classes = {}
+    for record in scripts:
+        for item in record['items']:
+            cost = classes.setdefault(item['classname'], [0, 0, 0, 0])
+            cost[0] += 1
+            cost[1] += item['bytes']
+            cost[2] += item['lines']
+            cost[3] += item['sends']
+    print()
+    print("{:>8} {:>7} {:>6} {:>6}  Class".format('Bytes', 'Lines', 'Sends', 'Count'))
+    for classname, (count, size, lines, sends) in sorted(classes.items(), key=lambda x: x[1][1], reverse=True):
+        print("{:>8} {:>7} {:>6} {:>6}  {}".format(size, lines, sends, count, classname))
@@ -1,7 +1,8 @@
 from .control import Control, ControlHeights
-from .base import const, convertValueToObjc
+from .base import const, convertValueToObjc, generateArrayLoop, TABLE_DRIVEN_MIN_ITEMS
 from .types import NLSTR
 from .property import Property
+from . import globalvars
 
 class Segment(object):
     def __init__(self, label, width):
@@ -46,18 +47,50 @@ class SegmentedControl(Control):
         self._adjustWidth()
         return result
     
+    def _generateSegmentsLoop(self):
+        segments = self.segments
+        arrays = [
+            ('NSString *', '_labels', [convertValueToObjc(s.label) for s in segments]),
+            ('CGFloat', '_widths', [convertValueToObjc(s.width) for s in segments]),
+        ]
+        body = "[$varname$ setLabel:_labels[_i] forSegment:_i];\n"
+        body += "[$varname$ setWidth:_widths[_i] forSegment:_i];\n"
+        if any(s.image for s in segments):
+            images = [convertValueToObjc(NLSTR(s.image) if s.image else None) for s in segments]
+            arrays.append(('NSString *', '_images', images))
+            body += "if (_images[_i] != nil) {\n[$varname$ setImage:[NSImage imageNamed:_images[_i]] forSegment:_i];\n}\n"
+        return generateArrayLoop(arrays, body)
+    
+    def _generateAccessibility(self):
+        # Setting the description of a child makes AppKit look the control's children up, so when
+        # more than one segment has a description, we set them all with a single lookup.
+        segments = self.segments
+        described = [(i, s) for i, s in enumerate(segments) if s.accessibilityDescription]
+        if not described:
+            return ''
+        if len(described) == 1:
+            index, segment = described[0]
+            return 'setAccessibilityDescriptionOfChild($varname$, {}, {});\n'.format(
+                convertValueToObjc(index), convertValueToObjc(segment.accessibilityDescription))
+        descriptions = [convertValueToObjc(s.accessibilityDescription or None) for s in segments]
+        return "{\nNSString *_descriptions[] = {\n%s\n};\nsetAccessibilityDescriptionsOfChildren($varname$, _descriptions, %d);\n}\n" % (
+            ', '.join(descriptions), len(descriptions))
+    
     def generateInit(self):
         tmpl = Control.generateInit(self)
         tmpl.setup += self.accessor._callMethod('setSegmentCount', len(self.segments))
+        if globalvars.globalTableDriven and len(self.segments) >= TABLE_DRIVEN_MIN_ITEMS:
+            tmpl.setup += self._generateSegmentsLoop()
+            tmpl.setup += self._generateAccessibility()
+            return tmpl
         for index, segment in enumerate(self.segments):
             tmpl.setup += '[$varname$ setLabel:{} forSegment:{}];\n'.format(
                 convertValueToObjc(segment.label), convertValueToObjc(index))
             tmpl.setup += '[$varname$ setWidth:{} forSegment:{}];\n'.format(
                 convertValueToObjc(segment.width), convertValueToObjc(index))
             if segment.image:
-                tmpl.setup += '[$varname$ setImage:[NSImage imageNamed:{}] forSegment:{}];\n'.format(
-                convertValueToObjc(NLSTR(segment.image)), convertValueToObjc(index))
-            if segment.accessibilityDescription:
-                tmpl.setup += 'setAccessibilityDescriptionOfChild($varname$, {}, {});\n'.format(
-                    convertValueToObjc(index), convertValueToObjc(segment.accessibilityDescription))
+                image = '[NSImage imageNamed:{}]'.format(convertValueToObjc(NLSTR(segment.image)))
+                tmpl.setup += '[$varname$ setImage:{} forSegment:{}];\n'.format(
+                    globalvars.globalConstantPool.use('NSImage *', image), convertValueToObjc(index))
+        tmpl.setup += self._generateAccessibility()
         return tmpl
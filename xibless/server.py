@@ -0,0 +1,139 @@
+from __future__ import print_function
+
+import sys
+import os
+import os.path as op
+import socket
+import json
+from contextlib import closing
+
+# A build compiles a lot of UI scripts, each of them through a new xibless process. With `xibless
+# serve`, a single long-lived process (with everything already imported and the script cache warm)
+# listens on a Unix socket and the xibless processes launched by the build only forward their
+# compile requests to it.
+#
+# The protocol is made of JSON messages, one per line. The client sends a single request:
+#   {"command": "compile", "source": ..., "dest": ..., "options": {...}}
+# The server answers with zero or more {"output": text} messages (what the script printed)
+# followed by a {"done": true, "error": null or traceback, "elidedSetterCount": n} message. The
+# server handles requests one at a time because generation relies on global state.
+
+def defaultSocketPath():
+    folder = os.environ.get('TMPDIR', '/tmp')
+    return op.join(folder, 'xibless-{}.sock'.format(os.getuid()))
+
+def _sendMessage(fp, message):
+    fp.write((json.dumps(message) + '\n').encode('utf-8'))
+    fp.flush()
+
+def _readMessages(fp):
+    for line in fp:
+        yield json.loads(line.decode('utf-8'))
+
+class _OutputForwarder(object):
+    # Replaces sys.stdout while a request is being processed.
+    def __init__(self, fp):
+        self.fp = fp
+
+    def write(self, text):
+        if text:
+            _sendMessage(self.fp, {'output': text})
+
+    def flush(self):
+        pass
+
+
+def _handleRequest(request, fp):
+    from . import globalvars
+    from .gen import generate
+    error = None
+    oldStdout = sys.stdout
+    sys.stdout = _OutputForwarder(fp)
+    try:
+        if request.get('command') != 'compile':
+            raise ValueError("Unknown command: {!r}".format(request.get('command')))
+        generate(request['source'], request['dest'], **request.get('options', {}))
+    except (Exception, SystemExit):
+        # A script calling sys.exit() fails its compilation, not the server.
+        import traceback
+        error = traceback.format_exc()
+    finally:
+        sys.stdout = oldStdout
+    elided = globalvars.globalGenerationCounter.elidedSetterCount
+    _sendMessage(fp, {'done': True, 'error': error, 'elidedSetterCount': elided})
+
+def _isListening(socketPath):
+    with closing(socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)) as sock:
+        try:
+            sock.connect(socketPath)
+        except socket.error:
+            return False
+        return True
+
+def serve(socketPath=None):
+    """Listens on ``socketPath`` for compile requests until interrupted."""
+    if socketPath is None:
+        socketPath = defaultSocketPath()
+    if op.exists(socketPath):
+        if _isListening(socketPath):
+            raise EnvironmentError("A xibless server is already listening on {}".format(socketPath))
+        os.remove(socketPath) # stale socket from a server that didn't exit cleanly
+    # Warm up our imports now rather than on the first request.
+    from . import gen
+    gen.scriptNamespace(compile('\n'.join(gen.SCRIPT_NAMES), '<warmup>', 'exec'))
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        # Only our user can connect. The socket is created with these permissions, so there's no
+        # window during which anyone else could connect.
+        oldUmask = os.umask(0o177)
+        try:
+            server.bind(socketPath)
+        finally:
+            os.umask(oldUmask)
+        server.listen(5)
+        print("Listening on {}".format(socketPath))
+        while True:
+            conn, _ = server.accept()
+            try:
+                with closing(conn), closing(conn.makefile('rwb')) as fp:
+                    for request in _readMessages(fp):
+                        _handleRequest(request, fp)
+                        break
+            except (socket.error, EnvironmentError) as e:
+                # The client went away (a build that was interrupted, for example). We keep serving.
+                print("Connection error: {}".format(e), file=sys.stderr)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        if op.exists(socketPath):
+            os.remove(socketPath)
+
+def compileRemote(source, dest, socketPath=None, **options):
+    """Forwards a compile request to the server listening on ``socketPath``.
+
+    What the script prints is written to stdout as it comes. Returns the number of elided setters.
+    Raises ``EnvironmentError`` if there's no server and ``RuntimeError`` if the compilation failed
+    (with the server's traceback as a message).
+    """
+    if socketPath is None:
+        socketPath = defaultSocketPath()
+    request = {
+        'command': 'compile',
+        # The server doesn't share our working directory.
+        'source': op.abspath(source),
+        'dest': op.abspath(dest),
+        'options': options,
+    }
+    with closing(socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)) as sock:
+        sock.connect(socketPath)
+        with closing(sock.makefile('rwb')) as fp:
+            _sendMessage(fp, request)
+            for message in _readMessages(fp):
+                if 'output' in message:
+                    sys.stdout.write(message['output'])
+                elif message.get('done'):
+                    if message['error']:
+                        raise RuntimeError(message['error'])
+                    return message['elidedSetterCount']
+    raise EnvironmentError("The xibless server closed the connection unexpectedly")
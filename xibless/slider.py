@@ -8,6 +8,8 @@ class Slider(Control):
         'minValue', 'maxValue', Property('value', 'intValue'), 'numberOfTickMarks',
         'tickMarkPosition', 'allowsTickMarkValuesOnly',
     ]
+    COCOA_DEFAULTS = dict(Control.COCOA_DEFAULTS, minValue=0, maxValue=1, numberOfTickMarks=0,
+        allowsTickMarkValuesOnly=False)
     
     def __init__(self, parent, minValue, maxValue, value=0):
         self.minValue = minValue
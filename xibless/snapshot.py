@@ -0,0 +1,160 @@
+import os
+import os.path as op
+import json
+
+from .gen import runScript
+from .view import View, Pack
+from .window import Window
+from .types import Flags, Literal
+from .preview import walkLayout
+
+# A snapshot is the fully laid-out view tree of a UI script, in a JSON-friendly form. Comparing the
+# snapshots of the same scripts made with two xibless versions lets us catch layout regressions
+# without building any app. Snapshots of many scripts are written as JSON lines (one script per
+# line) so that they can be written and compared as a stream.
+
+CORNER_NAMES = {value: name for name, value in vars(Pack).items() if isinstance(value, int)}
+
+def _maskNames(mask):
+    if not isinstance(mask, Flags):
+        mask = [mask]
+    return sorted((flag.value if isinstance(flag, Literal) else flag) for flag in mask)
+
+def _round(values):
+    return [round(v, 2) for v in values]
+
+def snapshotView(root):
+    """Returns the list of view records for ``root`` and all views under it, parents first.
+
+    Each record is a dict with ``key``, ``class``, ``varname``, ``parent`` (the key of the parent),
+    ``frame`` (relative to the parent), ``anchor`` and ``mask`` (autoresizing mask flag names).
+    ``key`` identifies the view across snapshots: its varname if it has one, else a path made of
+    its parent's key and its class and index among its siblings.
+    """
+    result = []
+    keys = {}
+    siblingCounts = {}
+    for view, parent, absoluteRect in walkLayout(root, allTabs=True):
+        varname = view._varname if view._varname and not view._varname.startswith('_tmp') else None
+        parentKey = keys[id(parent)] if parent is not None else None
+        className = type(view).__name__
+        if varname:
+            key = varname
+        else:
+            countKey = (parentKey, className)
+            index = siblingCounts.get(countKey, 0)
+            siblingCounts[countKey] = index + 1
+            key = '{}/{}[{}]'.format(parentKey, className, index)
+        keys[id(view)] = key
+        corner, growX, growY = view.anchor
+        result.append({
+            'key': key,
+            'class': className,
+            'varname': varname,
+            'parent': parentKey,
+            'frame': _round(view.frameRect()),
+            'anchor': [CORNER_NAMES.get(corner, corner), growX, growY],
+            'mask': None if isinstance(view, Window) else _maskNames(view.autoresizingMask()),
+        })
+    return result
+
+def snapshot(modulePath, args=None):
+    """Executes the UI script at ``modulePath`` and returns the snapshot of its result."""
+    if args is None:
+        args = {}
+    module_locals = runScript(modulePath, args)
+    result = module_locals.get('result')
+    if not isinstance(result, View):
+        raise ValueError("Only windows and views can be snapshotted")
+    return {'script': modulePath, 'views': snapshotView(result)}
+
+def findScripts(path):
+    # A single script, or all python scripts under a folder, in a stable order.
+    if not op.isdir(path):
+        return [path]
+    result = []
+    for folder, dirnames, filenames in os.walk(path):
+        dirnames[:] = sorted(d for d in dirnames if d != '__pycache__')
+        result += [op.join(folder, fn) for fn in sorted(filenames) if fn.endswith('.py')]
+    return result
+
+def writeSnapshots(scriptPaths, fp):
+    """Writes the snapshot of each script as a JSON line in ``fp`` and returns the error count.
+
+    Scripts are all executed in the current process. A script that fails to execute doesn't stop
+    the run: an ``error`` record is written in place of its views.
+    """
+    errorCount = 0
+    for path in scriptPaths:
+        try:
+            record = snapshot(path)
+        except Exception as e:
+            record = {'script': path, 'error': '{}: {}'.format(type(e).__name__, e)}
+            errorCount += 1
+        fp.write(json.dumps(record, sort_keys=True, separators=(',', ':')) + '\n')
+        fp.flush()
+    return errorCount
+
+def _frameDelta(frame1, frame2):
+    return max(abs(v1 - v2) for v1, v2 in zip(frame1, frame2))
+
+def diffSnapshots(old, new, tolerance=0, tolerances=None):
+    """Returns a list of human readable differences between two snapshots of the same script.
+
+    Frame differences of ``tolerance`` points or less are ignored. ``tolerances`` can map view
+    keys to a tolerance that overrides the default one for that view.
+    """
+    if old.get('error') or new.get('error'):
+        if old.get('error') == new.get('error'):
+            return []
+        return ["error: {} -> {}".format(old.get('error'), new.get('error'))]
+    tolerances = tolerances or {}
+    result = []
+    oldViews = {view['key']: view for view in old['views']}
+    newKeys = set()
+    for newView in new['views']:
+        key = newView['key']
+        newKeys.add(key)
+        oldView = oldViews.get(key)
+        if oldView is None:
+            result.append("{}: added".format(key))
+            continue
+        for attr in ('class', 'parent', 'anchor', 'mask'):
+            if oldView[attr] != newView[attr]:
+                result.append("{}: {} {} -> {}".format(key, attr, oldView[attr], newView[attr]))
+        viewTolerance = tolerances.get(key, tolerance)
+        if _frameDelta(oldView['frame'], newView['frame']) > viewTolerance:
+            result.append("{}: frame {} -> {}".format(key, oldView['frame'], newView['frame']))
+    for view in old['views']:
+        if view['key'] not in newKeys:
+            result.append("{}: removed".format(view['key']))
+    return result
+
+def diffSnapshotFiles(oldPath, newPath, tolerance=0, tolerances=None):
+    """Yields ``(script, differences)`` for every script whose snapshots differ in the two files.
+
+    ``newPath`` is read as a stream, scripts being compared as soon as they're read. Scripts that
+    are only in one of the files are reported as such.
+    """
+    with open(oldPath, 'rt') as fp:
+        # We keep the lines as is so that identical snapshots can be skipped without comparing
+        # their views.
+        oldLines = {}
+        for line in fp:
+            if line.strip():
+                oldLines[json.loads(line)['script']] = line
+    with open(newPath, 'rt') as fp:
+        for line in fp:
+            if not line.strip():
+                continue
+            new = json.loads(line)
+            script = new['script']
+            oldLine = oldLines.pop(script, None)
+            if oldLine is None:
+                yield script, ["script added"]
+            elif oldLine != line:
+                differences = diffSnapshots(json.loads(oldLine), new, tolerance, tolerances)
+                if differences:
+                    yield script, differences
+    for script in oldLines:
+        yield script, ["script removed"]
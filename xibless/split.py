@@ -0,0 +1,169 @@
+import re
+
+# Splits the body of a generated function into helper functions so that huge UIs don't end up as
+# a single giant function, which compilers optimize slowly, and so that parts of a UI can be put
+# in separate units and be compiled in parallel.
+#
+# The body is a list of pieces, the code generated by each top level item, in generation order.
+# We only move a range of pieces in a helper if it's self-contained: none of the variables that it
+# declares is used after it. This is typically the case of the subtree of a box or of a tab view.
+# The variables declared before the range that it uses (parent views, owner, constants) are passed
+# to the helper as arguments. Consecutive self-contained ranges are grouped until they hold at
+# least `splitSize` items (declared variables). Helpers that are big enough are split in the same
+# way. Items that generate other items in their own code, such as tab views, can mark where that
+# code can be cut with PIECE_SEPARATOR.
+
+PIECE_SEPARATOR = '\x00piece\x00'
+
+RE_LITERAL_OR_COMMENT = re.compile(r'''"(?:[^"\\\n]|\\.)*"|'(?:[^'\\\n]|\\.)*'|//[^\n]*|/\*.*?\*/''', re.DOTALL)
+RE_IDENTIFIER = re.compile(r'[A-Za-z_]\w*')
+# "NSButton *foo = ..." or "NSFont *foo;" at the top level of a piece.
+RE_DECLARATION = re.compile(r'\s*([A-Za-z_]\w*)\s*(\**)\s*([A-Za-z_]\w*)\s*[=;]')
+NOT_TYPES = {'return', 'goto', 'else', 'case', 'static'}
+
+def declarationType(ctype, name):
+    if not ctype.endswith('*'):
+        ctype += ' '
+    return ctype + name
+
+def findDeclarations(code):
+    # Returns a {name: ctype} dict of the variables declared at the top level of `code`, which
+    # must be stripped of its literals and comments.
+    result = {}
+    depth = 0
+    for line in code.split('\n'):
+        if depth == 0:
+            match = RE_DECLARATION.match(line)
+            if match is not None and match.group(1) not in NOT_TYPES:
+                ctype, stars, name = match.groups()
+                result[name] = ctype + (' ' + stars if stars else '')
+        depth += line.count('{') - line.count('}')
+    return result
+
+def braceDepth(code):
+    stripped = RE_LITERAL_OR_COMMENT.sub('""', code)
+    return stripped.count('{') - stripped.count('}')
+
+def cutPieces(code):
+    # Cuts `code` at its PIECE_SEPARATOR markers, except where it would cut a block in two.
+    result = []
+    for piece in code.split(PIECE_SEPARATOR):
+        if result and braceDepth(result[-1]) != 0:
+            result[-1] += piece
+        else:
+            result.append(piece)
+    return result
+
+class CodePiece(object):
+    def __init__(self, code):
+        self.code = code
+        stripped = RE_LITERAL_OR_COMMENT.sub('""', code)
+        # Selectors are also picked up, which only makes us more conservative.
+        self.used = set(RE_IDENTIFIER.findall(stripped))
+        self.declared = findDeclarations(stripped)
+        self.itemCount = len(self.declared)
+
+
+class HelperFunction(object):
+    def __init__(self, name, params, body, nested):
+        self.name = name
+        self.params = params # [(ctype, name)]
+        self.body = body # [code]
+        self.nested = nested # HelperFunction called by this one (and only this one)
+
+    def signature(self, static):
+        params = ', '.join(declarationType(ctype, name) for ctype, name in self.params)
+        return '%svoid %s(%s)' % ('static ' if static else '', self.name, params)
+
+    def definition(self, static):
+        return '%s\n{\n%s}\n' % (self.signature(static), ''.join(code + '\n' for code in self.body))
+
+    def call(self):
+        return '%s(%s);' % (self.name, ', '.join(name for ctype, name in self.params))
+
+    def allFunctions(self):
+        # Self and the functions it calls, callees first.
+        result = []
+        for function in self.nested:
+            result += function.allFunctions()
+        result.append(self)
+        return result
+
+
+class UnitSplitter(object):
+    def __init__(self, unitName, splitSize):
+        self.unitName = unitName
+        self.splitSize = splitSize
+        self.functionCount = 0
+
+    def _makeFunction(self, pieces, visible):
+        declared = {}
+        used = set()
+        itemCount = 0
+        for piece in pieces:
+            declared.update(piece.declared)
+            used |= piece.used
+            itemCount += piece.itemCount
+        params = [(visible[name], name) for name in sorted(used) if name in visible and name not in declared]
+        self.functionCount += 1
+        name = '_create%sPart%d' % (self.unitName, self.functionCount)
+        if itemCount >= self.splitSize * 2:
+            body, nested = self.split(pieces, dict(((n, t) for t, n in params)), len(pieces))
+        else:
+            body, nested = [piece.code for piece in pieces], []
+        return HelperFunction(name, params, body, nested)
+
+    def split(self, pieces, visible, splittableCount, extraUsed=()):
+        """Returns ``(body, functions)``.
+
+        ``body`` is the list of the codes of ``pieces`` that stay where they are and of calls to
+        the ``functions`` that the other pieces were moved to. ``visible`` maps the names of the
+        variables that can be passed to helpers to their type. Only the first ``splittableCount``
+        pieces can be moved and ``extraUsed`` are the names used after ``pieces``.
+        """
+        visible = dict(visible)
+        lastUses = {}
+        for index, piece in enumerate(pieces):
+            visible.update(piece.declared)
+            for name in piece.used:
+                lastUses[name] = index
+        for name in extraUsed:
+            lastUses[name] = len(pieces)
+        body = []
+        functions = []
+        chunk = []
+        chunkItemCount = [0]
+        def flushChunk():
+            # A helper holding all of the pieces would only be an indirection.
+            if chunkItemCount[0] >= self.splitSize and len(chunk) < len(pieces):
+                function = self._makeFunction(chunk, visible)
+                functions.append(function)
+                body.append(function.call())
+            else:
+                body.extend(piece.code for piece in chunk)
+            del chunk[:]
+            chunkItemCount[0] = 0
+
+        index = 0
+        while index < splittableCount:
+            # The smallest self-contained range starting at `index`.
+            end = index + 1
+            current = index
+            while current < end and end <= splittableCount:
+                for name in pieces[current].declared:
+                    end = max(end, lastUses.get(name, current) + 1)
+                current += 1
+            if end > splittableCount:
+                flushChunk()
+                body.append(pieces[index].code)
+                index += 1
+                continue
+            for piece in pieces[index:end]:
+                chunk.append(piece)
+                chunkItemCount[0] += piece.itemCount
+            index = end
+            if chunkItemCount[0] >= self.splitSize:
+                flushChunk()
+        flushChunk()
+        body.extend(piece.code for piece in pieces[splittableCount:])
+        return body, functions
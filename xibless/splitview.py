@@ -3,6 +3,7 @@ from .view import View
 class SplitView(View):
     OBJC_CLASS = 'NSSplitView'
     PROPERTIES = View.PROPERTIES + ['vertical', 'dividerStyle']
+    COCOA_DEFAULTS = dict(View.COCOA_DEFAULTS, vertical=False)
     
     def __init__(self, parent, subviewCount, vertical):
         View.__init__(self, parent, 100, 100)
@@ -0,0 +1,117 @@
+import os
+import os.path as op
+import re
+import codecs
+from collections import OrderedDict
+
+# Maintains the .strings files matching the localization tables of generated units, so that
+# translators don't have to run genstrings over the generated code. Strings are kept in their
+# escaped form (the one they have in the generated code), which is also the one .strings files use,
+# so they're never unescaped.
+#
+# A build generates a lot of units, often with the same table. Files are parsed once per process
+# and kept in memory: as long as a file isn't modified by someone else, merging the strings of
+# another unit in it doesn't read it again, and it's only written if it gets new strings.
+
+RE_STRINGS_TOKEN = re.compile(r'''
+    (?P<comment>/\*.*?\*/|//[^\n]*)
+    |"(?P<key>(?:[^"\\]|\\.)*)"\s*=\s*"(?P<value>(?:[^"\\]|\\.)*)"\s*;
+''', re.VERBOSE | re.DOTALL)
+
+# Encoding in which we write new files. This is what the files of the demos use.
+DEFAULT_ENCODING = 'utf-8-sig'
+
+def _detectEncoding(data):
+    if data.startswith(codecs.BOM_UTF16_LE) or data.startswith(codecs.BOM_UTF16_BE):
+        return 'utf-16'
+    elif data.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    else:
+        return 'utf-8'
+
+def parseStrings(text):
+    """Returns an ``OrderedDict`` mapping the keys of the .strings content ``text`` to their value.
+
+    Values are ``(value, comment)`` tuples, ``comment`` being the comments preceding the entry
+    (an empty string if there are none).
+    """
+    result = OrderedDict()
+    comments = []
+    for match in RE_STRINGS_TOKEN.finditer(text):
+        if match.group('comment'):
+            comments.append(match.group('comment'))
+        else:
+            result[match.group('key')] = (match.group('value'), '\n'.join(comments))
+            comments = []
+    return result
+
+def formatStrings(entries):
+    """Returns the .strings content for ``entries`` (as returned by ``parseStrings()``), sorted by key."""
+    lines = []
+    for key in sorted(entries):
+        value, comment = entries[key]
+        if comment:
+            lines.append(comment)
+        lines.append('"{}" = "{}";'.format(key, value))
+    return '\n'.join(lines) + '\n'
+
+class _StringsFile(object):
+    def __init__(self, path):
+        self.path = path
+        self.stat = None
+        self.entries = OrderedDict()
+        self.encoding = DEFAULT_ENCODING
+
+    def _currentStat(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_mtime, st.st_size)
+
+    def load(self):
+        # Only reads the file if it changed since we last read or wrote it.
+        stat = self._currentStat()
+        if stat == self.stat:
+            return
+        if stat is None:
+            self.entries = OrderedDict()
+            self.encoding = DEFAULT_ENCODING
+        else:
+            with open(self.path, 'rb') as fp:
+                data = fp.read()
+            self.encoding = _detectEncoding(data)
+            self.entries = parseStrings(data.decode(self.encoding))
+        self.stat = stat
+
+    def save(self):
+        folder = op.dirname(self.path)
+        if folder and not op.exists(folder):
+            os.makedirs(folder)
+        with open(self.path, 'wb') as fp:
+            fp.write(formatStrings(self.entries).encode(self.encoding))
+        self.stat = self._currentStat()
+
+
+_openFiles = {}
+
+def mergeStrings(path, strings):
+    """Adds the ``strings`` that aren't already in the .strings file at ``path`` to it.
+
+    New strings are their own translation. Existing entries (and their comments) are kept as they
+    are. The file is created if it doesn't exist and is rewritten, sorted by key, only if there are
+    new strings. Returns the number of strings that were added.
+    """
+    path = op.abspath(path)
+    stringsFile = _openFiles.get(path)
+    if stringsFile is None:
+        stringsFile = _openFiles[path] = _StringsFile(path)
+    stringsFile.load()
+    added = 0
+    for string in strings:
+        if string not in stringsFile.entries:
+            stringsFile.entries[string] = (string, '')
+            added += 1
+    if added or stringsFile.stat is None:
+        stringsFile.save()
+    return added
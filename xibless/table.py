@@ -1,10 +1,13 @@
-from .base import GeneratedItem, convertValueToObjc, const
+from .base import (GeneratedItem, convertValueToObjc, const, generateArrayLoop,
+    generateAllocInit, TABLE_DRIVEN_MIN_ITEMS)
 from .types import KeyValueId, Flags, NonLocalizableString
 from .property import Property
 from .view import View
+from . import globalvars
 
 class TableColumn(GeneratedItem):
     OBJC_CLASS = 'NSTableColumn'
+    COCOA_DEFAULTS = dict(GeneratedItem.COCOA_DEFAULTS, editable=True)
     
     def __init__(self, table, identifier, title, width):
         GeneratedItem.__init__(self)
@@ -18,9 +21,22 @@ class TableColumn(GeneratedItem):
         self.autoResizable = False
         self.dataCell = None
     
+    def _resizingMask(self):
+        resizingMask = Flags()
+        if self.userResizable:
+            resizingMask.add('NSTableColumnUserResizingMask')
+        if self.autoResizable:
+            resizingMask.add('NSTableColumnAutoresizingMask')
+        return resizingMask
+    
     def dependencies(self):
         return [self.font, self.dataCell]
     
+    def canBeTableDriven(self):
+        if not GeneratedItem.canBeTableDriven(self):
+            return False
+        return self.dataCell is None and None not in (self.title, self.width, self.editable)
+    
     def generateInit(self):
         tmpl = GeneratedItem.generateInit(self)
         tmpl.initmethod = "initWithIdentifier:$identifier$"
@@ -33,11 +49,7 @@ class TableColumn(GeneratedItem):
                 self.properties['dataCell.font'] = self.font
         self.properties['width'] = self.width
         self.properties['editable'] = self.editable
-        resizingMask = Flags()
-        if self.userResizable:
-            resizingMask.add('NSTableColumnUserResizingMask')
-        if self.autoResizable:
-            resizingMask.add('NSTableColumnAutoresizingMask')
+        resizingMask = self._resizingMask()
         if resizingMask:
             self.properties['resizingMask'] = resizingMask
         return tmpl
@@ -51,6 +63,9 @@ class TableView(View):
         'dataSource', Property('alternatingRows', 'usesAlternatingRowBackgroundColors'),
         'gridStyleMask', 
     ]
+    COCOA_DEFAULTS = dict(View.COCOA_DEFAULTS, allowsEmptySelection=True,
+        allowsMultipleSelection=False, allowsTypeSelect=True, gridStyleMask=const.NSTableViewGridNone,
+        columnAutoresizingStyle=const.NSTableViewLastColumnOnlyAutoresizingStyle)
     
     def __init__(self, parent):
         View.__init__(self, parent, 100, 100)
@@ -59,6 +74,45 @@ class TableView(View):
         self.editable = True
         self.borderType = const.NSBezelBorder
     
+    def _canGenerateColumnsLoop(self):
+        columns = self.columns
+        if len(columns) < TABLE_DRIVEN_MIN_ITEMS:
+            return False
+        font = columns[0].font
+        return all(c.canBeTableDriven() and c.font is font for c in columns)
+    
+    def _generateColumnsLoop(self):
+        columns = self.columns
+        result = ''
+        font = columns[0].font
+        if isinstance(font, GeneratedItem) and not font.generated:
+            result += font.generate()
+        identifiers = [convertValueToObjc(NonLocalizableString(c.identifier)) for c in columns]
+        masks = [convertValueToObjc(c._resizingMask() or 0) for c in columns]
+        arrays = [
+            ('NSString *', '_identifiers', identifiers),
+            ('NSString *', '_titles', [convertValueToObjc(c.title) for c in columns]),
+            ('CGFloat', '_widths', [convertValueToObjc(c.width) for c in columns]),
+            ('BOOL', '_editables', [convertValueToObjc(c.editable) for c in columns]),
+            ('NSUInteger', '_resizingMasks', masks),
+        ]
+        body = "NSTableColumn *_col = %s;\n" % generateAllocInit('NSTableColumn', 'initWithIdentifier:_identifiers[_i]')
+        body += "[[_col headerCell] setStringValue:_titles[_i]];\n"
+        if font is not None:
+            body += "[[_col dataCell] setFont:%s];\n" % convertValueToObjc(font)
+        body += "[_col setWidth:_widths[_i]];\n"
+        body += "[_col setEditable:_editables[_i]];\n"
+        body += "if (_resizingMasks[_i] != 0) {\n[_col setResizingMask:_resizingMasks[_i]];\n}\n"
+        body += "[$varname$ addTableColumn:_col];\n"
+        loop = generateArrayLoop(arrays, body)
+        report = globalvars.globalCodeReport
+        if report is not None:
+            report.addChildrenCode(columns, loop.replace('$varname$', self.varname))
+        result += loop
+        for column in columns:
+            globalvars.globalGenerationCounter.addGenerated(column)
+        return result
+    
     def addColumn(self, identifier, title, width):
         column = TableColumn(self, identifier, title, width)
         self.columns.append(column)
@@ -66,7 +120,7 @@ class TableView(View):
     
     def generateInit(self):
         tmpl = View.generateInit(self)
-        viewsetup = """NSScrollView *$varname$_container = [[[NSScrollView alloc] initWithFrame:$rect$] autorelease];
+        viewsetup = """NSScrollView *$varname$_container = $containerinit$;
             [$varname$_container setDocumentView:$varname$];
             [$varname$_container setHasVerticalScroller:YES];
             [$varname$_container setHasHorizontalScroller:YES];
@@ -74,13 +128,17 @@ class TableView(View):
             [$varname$_container setBorderType:$borderType$];
             [$varname$_container setAutoresizingMask:$autoresize$];
         """
+        tmpl.containerinit = generateAllocInit('NSScrollView', 'initWithFrame:$rect$')
         tmpl.autoresize = convertValueToObjc(self.properties['autoresizingMask'])
         tmpl.borderType = convertValueToObjc(self.borderType)
         self.properties['columnAutoresizingStyle'] = const.NSTableViewUniformColumnAutoresizingStyle
-        for column in self.columns:
-            colcode = column.generate()
-            colcode += "[$varname$ addTableColumn:%s];\n" % column.varname
-            viewsetup += colcode
+        if globalvars.globalTableDriven and self._canGenerateColumnsLoop():
+            viewsetup += self._generateColumnsLoop()
+        else:
+            for column in self.columns:
+                colcode = column.generate()
+                colcode += "[$varname$ addTableColumn:%s];\n" % column.varname
+                viewsetup += colcode
         tmpl.viewsetup = viewsetup
         return tmpl
     
@@ -1,5 +1,6 @@
 from .base import GeneratedItem, convertValueToObjc, const
-from .view import View, Pack
+from .view import View, Pack, generateKeyViewChain
+from . import globalvars
 
 # Views in tab items have different margins than normal views.
 class TabSubView(View):
@@ -36,6 +37,7 @@ class TabViewItem(GeneratedItem):
 class TabView(View):
     OBJC_CLASS = 'NSTabView'
     PROPERTIES = View.PROPERTIES + ['tabViewType']
+    COCOA_DEFAULTS = dict(View.COCOA_DEFAULTS, tabViewType=const.NSTopTabsBezelBorder)
     OVERHEAD_W = 6
     OVERHEAD_H = 30
     
@@ -88,7 +90,27 @@ class TabView(View):
         for tab in self.tabs:
             tabcode = tab.generate()
             tabcode += "[$varname$ addTabViewItem:%s];\n" % tab.varname
+            if globalvars.globalSplitUnits:
+                # Each tab can go in its own helper function.
+                from .split import PIECE_SEPARATOR
+                tabcode = PIECE_SEPARATOR + tabcode + PIECE_SEPARATOR
             viewsetup += tabcode
         tmpl.viewsetup = viewsetup
         return tmpl
     
+    def keyViews(self):
+        return [self]
+    
+    def generateFinalize(self):
+        # Each tab has its own key view chain, starting at the tab item's initialFirstResponder.
+        # When a tab is selected, NSTabView links it between self and our own nextKeyView.
+        if not globalvars.globalStaticKeyViewLoop:
+            return ''
+        result = ''
+        for tab in self.tabs:
+            keyViews = tab.view.keyViews()
+            if keyViews:
+                result += tab.accessor._callMethod('setInitialFirstResponder', keyViews[0])
+                result += generateKeyViewChain(keyViews, loop=False)
+        return result
+    
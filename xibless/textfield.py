@@ -1,5 +1,5 @@
 from .property import Property
-from .control import Control, ControlHeights
+from .control import Control, ControlHeights, TextPaddings
 from .font import Font, FontFamily, FontSize
 
 class TextField(Control):
@@ -10,6 +10,11 @@ class TextField(Control):
         Property('placeholder', 'cell.placeholderString'),
         Property('usesSingleLineMode', 'cell.usesSingleLineMode')
     ]
+    COCOA_DEFAULTS = dict(Control.COCOA_DEFAULTS, **{
+        'editable': True,
+        'selectable': True,
+        'cell.usesSingleLineMode': False,
+    })
     
     def __init__(self, parent, text=None):
         Control.__init__(self, parent, 100, 22)
@@ -41,6 +46,8 @@ class TextField(Control):
 
 class Label(TextField):
     CONTROL_HEIGHTS = ControlHeights(17, 14, 11)
+    # The cell's text inset.
+    TEXT_PADDINGS = TextPaddings(4, 4, 4)
     
     def __init__(self, parent, text):
         TextField.__init__(self, parent, text)
@@ -51,6 +58,9 @@ class Label(TextField):
         self.layoutDeltaW = 6
         self.layoutDeltaH = 0
     
+    def _textsToFit(self):
+        return [self.text]
+    
     def generateInit(self):
         tmpl = TextField.generateInit(self)
         self.properties['editable'] = False
@@ -59,6 +69,9 @@ class Label(TextField):
         self.properties['bordered'] = False
         return tmpl
     
+    def canBecomeKeyView(self):
+        return False
+    
 
 class SearchField(TextField):
     OBJC_CLASS = 'NSSearchField'
@@ -66,6 +79,10 @@ class SearchField(TextField):
         Property('sendsWholeSearchString', 'cell.sendsWholeSearchString'),
         Property('searchesImmediately', 'cell.sendsSearchStringImmediately'),
     ]
+    COCOA_DEFAULTS = dict(TextField.COCOA_DEFAULTS, **{
+        'cell.sendsWholeSearchString': False,
+        'cell.sendsSearchStringImmediately': False,
+    })
     
     def __init__(self, parent, placeholder):
         TextField.__init__(self, parent, None)
@@ -1,4 +1,4 @@
-from .base import convertValueToObjc
+from .base import convertValueToObjc, generateAllocInit
 from .types import KeyValueId
 from .view import View
 from .font import Font, FontFamily, FontSize
@@ -18,7 +18,7 @@ class TextView(View):
     
     def generateInit(self):
         tmpl = View.generateInit(self)
-        tmpl.viewsetup = """NSScrollView *$varname$_container = [[[NSScrollView alloc] initWithFrame:$rect$] autorelease];
+        tmpl.viewsetup = """NSScrollView *$varname$_container = $containerinit$;
             [$varname$_container setDocumentView:$varname$];
             [$varname$_container setHasVerticalScroller:YES];
             [$varname$_container setHasHorizontalScroller:NO];
@@ -26,6 +26,7 @@ class TextView(View):
             [$varname$_container setBorderType:NSBezelBorder];
             [$varname$_container setAutoresizingMask:$autoresize$];
         """
+        tmpl.containerinit = generateAllocInit('NSScrollView', 'initWithFrame:$rect$')
         tmpl.autoresize = convertValueToObjc(self.properties['autoresizingMask'])
         self.properties['textStorage.mutableString.string'] = self.text
         self.properties['textStorage.font'] = self.font
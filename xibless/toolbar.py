@@ -1,12 +1,15 @@
-from .base import GeneratedItem, const, convertValueToObjc
+from .base import GeneratedItem, const, convertValueToObjc, scheduleGeneration
 from .types import NonLocalizableString
 from .view import Size
+from . import globalvars
 
 class Toolbar(GeneratedItem):
     OBJC_CLASS = 'NSToolbar'
     PROPERTIES = GeneratedItem.PROPERTIES + [
         'allowsUserCustomization', 'autosavesConfiguration', 'displayMode',
     ]
+    COCOA_DEFAULTS = dict(GeneratedItem.COCOA_DEFAULTS, allowsUserCustomization=False,
+        autosavesConfiguration=False, displayMode=const.NSToolbarDisplayModeDefault)
     
     def __init__(self, identifier):
         GeneratedItem.__init__(self)
@@ -14,6 +17,76 @@ class Toolbar(GeneratedItem):
         self.items = []
         self.defaultItems = []
         self.allowsUserCustomization = True
+        # When True, the code creating each item (and its view) is wrapped in a block that the
+        # delegate only calls when the toolbar asks for that item.
+        self.lazyItems = False
+    
+    def _itemViews(self, item):
+        # The item's view and the views under it, parents first.
+        result = [item.view] if item.view is not None else []
+        index = 0
+        while index < len(result):
+            result += result[index].subviews
+            index += 1
+        return result
+    
+    def _hasAssignments(self, item):
+        # Items that are assigned somewhere (to an outlet of the owner, for example) are created
+        # eagerly: the assignment has to be done when the UI is created, not when the toolbar asks
+        # for the item.
+        return any(i.hasAssignments() for i in [item] + self._itemViews(item))
+    
+    def _sharedDependencies(self, item):
+        # The items that the item and its views depend on and that are also used outside of them (a
+        # font that a window view uses too, for example). A builder's variables aren't visible
+        # outside of it, so these have to be created before the builder.
+        subtree = set([item] + self._itemViews(item))
+        dependencies = [i for i in scheduleGeneration(list(subtree)) if i not in subtree]
+        if not dependencies:
+            return []
+        counter = globalvars.globalGenerationCounter
+        stack = [i for i in counter.createdItems if i not in subtree and i not in dependencies]
+        usedOutside = set(stack)
+        while stack:
+            for dependency in stack.pop().dependencies():
+                if isinstance(dependency, GeneratedItem) and dependency not in subtree \
+                        and dependency not in usedOutside:
+                    usedOutside.add(dependency)
+                    stack.append(dependency)
+        return [i for i in dependencies if i in usedOutside]
+    
+    def _generateBuilderBody(self, item):
+        # Everything the item holds has to be created in the builder, before the item. Variables
+        # declared in the builder aren't visible outside of it, so the code that usually comes at
+        # the end of the unit for these items (finalize code, batched bindings and accessibility
+        # descriptions) is generated in the builder, before we return the item.
+        counter = globalvars.globalGenerationCounter
+        alreadyGenerated = set(counter.generatedItems)
+        batchedBindings = globalvars.globalBatchedBindings
+        batchedAccessibility = globalvars.globalBatchedAccessibility
+        globalvars.globalBatchedBindings = None
+        globalvars.globalBatchedAccessibility = None
+        try:
+            code = ''
+            for view in self._itemViews(item):
+                if not view.generated:
+                    code += view.generate() + '\n'
+            code += item.generate() + '\n'
+        finally:
+            globalvars.globalBatchedBindings = batchedBindings
+            globalvars.globalBatchedAccessibility = batchedAccessibility
+        builderItems = [
+            i for i in counter.createdItems if i.generated and i not in alreadyGenerated
+        ]
+        report = globalvars.globalCodeReport
+        for builderItem in builderItems:
+            finalizeCode = builderItem.generateFinalize()
+            counter.addFinalized(builderItem)
+            if finalizeCode:
+                code += finalizeCode + '\n'
+                if report is not None:
+                    report.addCode(builderItem, finalizeCode)
+        return code
     
     def addItem(self, identifier, label, image=None):
         item = ToolbarItem(self, identifier, label, image)
@@ -34,9 +107,22 @@ class Toolbar(GeneratedItem):
         tmpl.initmethod = "initWithIdentifier:$identifier$"
         tmpl.identifier = convertValueToObjc(NonLocalizableString(self.identifier))
         tmpl.setup += "XiblessToolbarDelegate *$varname$Delegate = [[XiblessToolbarDelegate alloc] init]; [$varname$ setDelegate:$varname$Delegate];\n"
+        if globalvars.globalARC:
+            # The toolbar doesn't retain its delegate. Without ARC, we never release it. With ARC,
+            # we have to explicitly give it a reference that is never released.
+            tmpl.setup += "CFBridgingRetain($varname$Delegate);\n"
         for item in self.items:
-            tmpl.setup += item.generate()
-            tmpl.setup += "[$varname$Delegate addItem:{}];\n".format(item.varname)
+            if self.lazyItems and not self._hasAssignments(item):
+                for dependency in self._sharedDependencies(item):
+                    if not dependency.generated:
+                        tmpl.setup += dependency.generate() + '\n'
+                identifier = convertValueToObjc(NonLocalizableString(item.identifier))
+                tmpl.setup += "[$varname$Delegate addItemWithIdentifier:{} builder:^NSToolbarItem *{{\n".format(identifier)
+                tmpl.setup += self._generateBuilderBody(item)
+                tmpl.setup += "return {};\n}}];\n".format(item.varname)
+            else:
+                tmpl.setup += item.generate() + '\n'
+                tmpl.setup += "[$varname$Delegate addItem:{}];\n".format(item.varname)
         if self.defaultItems:
             convert = lambda it: convertValueToObjc((NonLocalizableString(it.identifier) if isinstance(it, ToolbarItem) else it))
             defaultItems = ','.join(convert(item) for item in self.defaultItems)
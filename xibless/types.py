@@ -1,4 +1,5 @@
-from collections import defaultdict, namedtuple
+import weakref
+from collections import namedtuple
 from . import globalvars
 
 try:
@@ -6,8 +7,56 @@ try:
 except NameError: # python 3
     basestring = str
 
+class ConstantPool(object):
+    # When globalPoolConstants is set, expressions creating the same constant object more than once
+    # in a unit are only evaluated once, in a local variable declared at the top of the generated
+    # function. Because we can't know how many times an expression is used before the whole unit is
+    # generated, use() returns a marker which is replaced by resolve() at the end of the generation.
+    # Only pass expressions that don't refer to generated items (which aren't declared yet at the
+    # top of the function). Uses are counted in the generated code rather than in use(): an
+    # expression can be converted more than once for a single use (properties are collected again
+    # when an item that was considered for a table-driven loop is generated individually).
+    MARKER = '\x00const%d\x00'
+    
+    def __init__(self):
+        self.reset()
+    
+    def reset(self):
+        self.constants = [] # (ctype, expression)
+        self.indexes = {}
+    
+    def use(self, ctype, expression):
+        if not globalvars.globalPoolConstants:
+            return expression
+        index = self.indexes.get(expression)
+        if index is None:
+            index = len(self.constants)
+            self.constants.append((ctype, expression))
+            self.indexes[expression] = index
+        return self.MARKER % index
+    
+    def resolve(self, code):
+        # Returns (declarations, code), the markers in `code` being replaced by their expression or,
+        # if it's used more than once, by the variable declared in `declarations`.
+        declarations = []
+        for index, (ctype, expression) in enumerate(self.constants):
+            marker = self.MARKER % index
+            if code.count(marker) > 1:
+                varname = '_const%d' % len(declarations)
+                if not ctype.endswith('*'):
+                    ctype += ' '
+                declarations.append('%s%s = %s;\n' % (ctype, varname, expression))
+            else:
+                varname = expression
+            code = code.replace(marker, varname)
+        return ''.join(declarations), code
+    
+
+globalvars.globalConstantPool = ConstantPool()
+
 def stringArray(strings):
-    return "[NSArray arrayWithObjects:%s,nil]" % ','.join(('@"%s"' % s) for s in strings)
+    result = "[NSArray arrayWithObjects:%s,nil]" % ','.join(('@"%s"' % s) for s in strings)
+    return globalvars.globalConstantPool.use('NSArray *', result)
 
 def wrapString(s):
     s = s.replace('\n', '\\n').replace('"', '\\"')
@@ -24,7 +73,14 @@ def convertValueToObjc(value, requireNSObject=False):
         result = wrapString(value)
         # '-' is the string we use for menu separators and we don't want to localize these.
         if value and value != '-' and globalvars.globalLocalizationTable:
-            result = 'NSLocalizedStringFromTable(%s, @"%s", @"")' % (result, globalvars.globalLocalizationTable)
+            strings = globalvars.globalLocalizedStrings
+            index = strings.setdefault(result[2:-1], len(strings))
+            if globalvars.globalCacheStrings:
+                # See gen.localizedStringsLookup()
+                result = '_localizedStrings[%d]' % index
+            else:
+                result = 'NSLocalizedStringFromTable(%s, @"%s", @"")' % (result, globalvars.globalLocalizationTable)
+                result = globalvars.globalConstantPool.use('NSString *', result)
         return result
     elif isinstance(value, bool):
         result = 'YES' if value else 'NO'
@@ -45,22 +101,30 @@ def convertValueToObjc(value, requireNSObject=False):
 
 def generateDictionary(source):
     elems = []
+    isConstant = True
     for key, value in source.items():
         elems.append(convertValueToObjc(value, requireNSObject=True))
         elems.append(convertValueToObjc(key))
+        if isinstance(key, KeyValueId) or isinstance(value, KeyValueId) or hasattr(value, 'generated'):
+            isConstant = False
     elems.append('nil')
-    return '[NSDictionary dictionaryWithObjectsAndKeys:{}]'.format(','.join(elems))
+    result = '[NSDictionary dictionaryWithObjectsAndKeys:{}]'.format(','.join(elems))
+    if isConstant:
+        result = globalvars.globalConstantPool.use('NSDictionary *', result)
+    return result
 
 class KeyValueId(object):
     # When we set an KeyValueId attribute in our source file, there no convenient way of saying,
     # at the codegen phase "this is exactly when this value was set, so I'll insert code to assign
-    # this value here." What we can do, however, is having a dictionary of all keys a certain value
-    # was assigned to and when we create the code for that value, we insert assignments right after.
-    VALUE2KEYS = defaultdict(set)
+    # this value here." What we can do, however, is having the value (if it's a GeneratedItem) keep
+    # track of all keys it was assigned to and when we create the code for that value, we insert
+    # assignments right after. The key, in turn, keeps a weak reference to the values that were
+    # assigned to it so that _clear() doesn't have to look at every assignment there is.
     def __init__(self, parent, name):
         self._parent = parent
         self._name = name
         self._children = {}
+        self._assignedValues = None
     
     def __repr__(self):
         return '<KeyValueId %s>' % self._objcAccessor()
@@ -80,7 +144,12 @@ class KeyValueId(object):
             object.__setattr__(self, name, value)
             return
         key = getattr(self, name)
-        KeyValueId.VALUE2KEYS[value].add(key)
+        # We look at the type because some of our values (ConstGenerator) answer to any attribute.
+        if hasattr(type(value), '_addAssignment'):
+            value._addAssignment(key)
+            if key._assignedValues is None:
+                key._assignedValues = weakref.WeakSet()
+            key._assignedValues.add(value)
     
     # the methods below aren't actually private, it's just that we prepend them with underscores to
     # avoid name clashes.
@@ -93,6 +162,12 @@ class KeyValueId(object):
         else:
             return self._name
     
+    def _root(self):
+        result = self
+        while result._parent is not None:
+            result = result._parent
+        return result
+    
     def _callMethod(self, methodname, argument=None, endline=True):
         # For now, this method only supports call to methods of zero or one argument.
         if argument is None:
@@ -107,8 +182,10 @@ class KeyValueId(object):
         for child in self._children.values():
             child._clear()
         self._children.clear()
-        for keys in KeyValueId.VALUE2KEYS.values():
-            keys.discard(self)
+        if self._assignedValues is not None:
+            for value in list(self._assignedValues):
+                value._removeAssignment(self)
+            self._assignedValues = None
     
 
 class ConstGenerator(object):
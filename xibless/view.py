@@ -2,8 +2,9 @@ from __future__ import division
 
 from collections import namedtuple, defaultdict
 
-from .base import GeneratedItem, const
+from .base import GeneratedItem, const, generateArrayLoop, TABLE_DRIVEN_MIN_ITEMS
 from .types import Flags, convertValueToObjc
+from . import globalvars
 
 class Pack(object):
     # Corners
@@ -89,6 +90,42 @@ class Rect(object):
         return 'NSMakeRect(%d, %d, %d, %d)' % (self.x, self.y, self.width, self.height)
     
 
+def readingOrder(views):
+    # Returns sibling `views` from top to bottom (Cocoa's y axis goes up) and, for views on the same
+    # row, from left to right. A view is on the row of the topmost view of that row if its vertical
+    # center is within that view's height.
+    def top(view):
+        x, y, w, h = view.frameRect()
+        return y + h
+    
+    rows = []
+    for view in sorted(views, key=top, reverse=True):
+        x, y, w, h = view.frameRect()
+        center = y + h / 2
+        if rows and rows[-1][0] <= center <= rows[-1][1]:
+            rows[-1][2].append(view)
+        else:
+            rows.append((y, y + h, [view]))
+    return [view for _, _, row in rows for view in sorted(row, key=lambda v: v.frameRect()[0])]
+
+def generateKeyViewChain(views, loop):
+    # Code making each of `views` the nextKeyView of the previous one and, if `loop` is set, the
+    # first one the nextKeyView of the last one.
+    if len(views) < 2:
+        return ''
+    nextViews = views[1:]
+    if loop:
+        nextViews.append(views[0])
+    else:
+        views = views[:-1]
+    if globalvars.globalTableDriven and len(views) >= TABLE_DRIVEN_MIN_ITEMS:
+        arrays = [
+            ('id', '_views', [v.varname for v in views]),
+            ('id', '_nextViews', [v.varname for v in nextViews]),
+        ]
+        return generateArrayLoop(arrays, "[_views[_i] setNextKeyView:_nextViews[_i]];\n")
+    return ''.join(v.accessor._callMethod('setNextKeyView', n) for v, n in zip(views, nextViews))
+
 class View(GeneratedItem):
     OBJC_CLASS = 'NSView'
     PROPERTIES = GeneratedItem.PROPERTIES + ['menu', 'delegate', 'focusRingType']
@@ -116,6 +153,7 @@ class View(GeneratedItem):
         self.y = 0
         self.anchor = Anchor(Pack.UpperLeft, False, False)
         self.accessibilityDescription = None
+        self.keyViewOrder = None
         # a mapping PackingSide: {views} which is used in fill() to know how much we can fill
         self.neighbors = defaultdict(set)
         
@@ -358,26 +396,21 @@ class View(GeneratedItem):
         if setAnchor:
             self.setAnchor(Pack.UpperLeft, growX=True, growY=True)
     
-    #--- Generate
-    def generateInit(self):
-        tmpl = GeneratedItem.generateInit(self)
-        tmpl.setup = "$viewsetup$\n$accessibility$\n$addtoparent$\n"
-        tmpl.initmethod = "initWithFrame:$rect$"
-        x, y, w, h = self.frameRect()
-        tmpl.rect = Rect(x, y, w, h).objcValue()
+    # The autoresizing mask matching our anchor, as a Flags or a single constant.
+    def autoresizingMask(self):
         anchor = self.anchor
         if anchor.growX and anchor.growY:
-            resizeMask = const.NSViewWidthSizable | const.NSViewHeightSizable
+            return const.NSViewWidthSizable | const.NSViewHeightSizable
         elif anchor.growX:
             if anchor.corner in {Pack.LowerLeft, Pack.LowerRight}:
-                resizeMask = const.NSViewWidthSizable | const.NSViewMaxYMargin
+                return const.NSViewWidthSizable | const.NSViewMaxYMargin
             else:
-                resizeMask = const.NSViewWidthSizable | const.NSViewMinYMargin
+                return const.NSViewWidthSizable | const.NSViewMinYMargin
         elif anchor.growY:
             if anchor.corner in {Pack.UpperLeft, Pack.LowerLeft}:
-                resizeMask = const.NSViewHeightSizable | const.NSViewMaxXMargin
+                return const.NSViewHeightSizable | const.NSViewMaxXMargin
             else:
-                resizeMask = const.NSViewHeightSizable | const.NSViewMinXMargin
+                return const.NSViewHeightSizable | const.NSViewMinXMargin
         else:
             resizeMask = Flags()
             if anchor.corner in {Pack.LowerLeft, Pack.UpperLeft, Pack.Left, Pack.Above, Pack.Below, Pack.Middle}:
@@ -388,10 +421,43 @@ class View(GeneratedItem):
                 resizeMask |= const.NSViewMaxYMargin
             if anchor.corner in {Pack.UpperLeft, Pack.UpperRight, Pack.Above, Pack.Left, Pack.Right, Pack.Middle}:
                 resizeMask |= const.NSViewMinYMargin
-        self.properties['autoresizingMask'] = resizeMask
+            return resizeMask
+    
+    #--- Key view loop
+    def canBecomeKeyView(self):
+        # Whether the view is part of the key view loop computed at generation time (see
+        # globalvars.globalStaticKeyViewLoop). Views with subviews are never part of it, their
+        # subviews are.
+        return True
+    
+    def keyViews(self):
+        # The views of the key view loop of self's subtree, in order. Views in tabs are in their own
+        # loop (see TabView).
+        if not self.subviews:
+            return [self] if self.canBecomeKeyView() else []
+        if self.keyViewOrder is not None:
+            subviews = self.keyViewOrder
+        else:
+            subviews = readingOrder(self.subviews)
+        result = []
+        for subview in subviews:
+            result += subview.keyViews()
+        return result
+    
+    #--- Generate
+    def generateInit(self):
+        tmpl = GeneratedItem.generateInit(self)
+        tmpl.setup = "$viewsetup$\n$accessibility$\n$addtoparent$\n"
+        tmpl.initmethod = "initWithFrame:$rect$"
+        x, y, w, h = self.frameRect()
+        tmpl.rect = Rect(x, y, w, h).objcValue()
+        self.properties['autoresizingMask'] = self.autoresizingMask()
         if self.accessibilityDescription:
-            tmpl.accessibility = "setAccessibilityDescription($varname$, {});\n".format(
-                convertValueToObjc(self.accessibilityDescription))
+            description = convertValueToObjc(self.accessibilityDescription)
+            if globalvars.globalBatchedAccessibility is not None:
+                globalvars.globalBatchedAccessibility.append((self.varname, description))
+            else:
+                tmpl.accessibility = "setAccessibilityDescription($varname$, {});\n".format(description)
         if self.parent is not None:
             tmpl.addtoparent = self.generateAddToParent()
         return tmpl
@@ -427,3 +493,6 @@ class Box(View):
         self.layoutDeltaW = 6
         self.layoutDeltaH = 4
     
+    def canBecomeKeyView(self):
+        return False
+    
@@ -1,6 +1,7 @@
 from .base import convertValueToObjc
 from .types import NLSTR
-from .view import View
+from .view import View, generateKeyViewChain
+from . import globalvars
 from .toolbar import Toolbar
 
 class Window(View):
@@ -18,6 +19,8 @@ class Window(View):
         self.initialFirstResponder = None
         self.autosaveName = None
         self.toolbar = None
+        self.deferred = False
+        self.visibleAtLaunch = False
     
     def createToolbar(self, identifier):
         assert self.toolbar is None
@@ -29,15 +32,20 @@ class Window(View):
     
     def generateInit(self):
         tmpl = View.generateInit(self)
-        tmpl.initmethod = "initWithContentRect:$rect$ styleMask:$style$ backing:NSBackingStoreBuffered defer:NO"
+        tmpl.initmethod = "initWithContentRect:$rect$ styleMask:$style$ backing:NSBackingStoreBuffered defer:$defer$"
+        tmpl.defer = convertValueToObjc(self.deferred)
         tmpl.viewsetup = """{
-        NSSize _screenSize = [[NSScreen mainScreen] visibleFrame].size;
+        NSSize _screenSize = $screenframe$.size;
         NSSize _windowSize = [$varname$ frame].size;
         CGFloat _windowX = (_screenSize.width - _windowSize.width) * $xprop$;
         CGFloat _windowY = (_screenSize.height - _windowSize.height) * $yprop$;
         [$varname$ setFrameOrigin:NSMakePoint(_windowX, _windowY)];
         }
         """
+        if globalvars.globalCacheScreenGeometry:
+            tmpl.screenframe = "mainScreenVisibleFrame()"
+        else:
+            tmpl.screenframe = "[[NSScreen mainScreen] visibleFrame]"
         tmpl.xprop = convertValueToObjc(self.xProportion)
         tmpl.yprop = convertValueToObjc(self.yProportion)
         styleFlags = ["NSTitledWindowMask"]
@@ -65,9 +73,17 @@ class Window(View):
             result += self._generateProperties({'frameAutosaveName': NLSTR(self.autosaveName)})
         if self.toolbar:
             result += self._generateProperties({'toolbar': self.toolbar})
-        result += '\n' + self.accessor._callMethod('recalculateKeyViewLoop')
+        if globalvars.globalStaticKeyViewLoop:
+            result += '\n' + generateKeyViewChain(self.keyViews(), loop=True)
+        else:
+            result += '\n' + self.accessor._callMethod('recalculateKeyViewLoop')
         return result
     
+    def generateCompletion(self):
+        # The window is only shown once everything else is done.
+        if self.visibleAtLaunch:
+            return '[%s orderFront:nil];\n' % self.varname
+    
 
 class PanelStyle(object):
     Regular = 0